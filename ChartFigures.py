@@ -0,0 +1,146 @@
+"""
+Plotly figures for the dashboard charts, built as plain {"data": [...], "layout": {...}}
+dicts instead of going through pandas DataFrames and plotly.express. The rows come
+straight from the aggregates sidecar (already ranked, see RepoAggregates), so a chart is
+a slice and a few list comprehensions, and serving one needs neither library imported.
+"""
+
+# The parts of plotly's default template these charts rely on; plotly.js supplies the rest
+PLOTLY_TEMPLATE = {
+    "layout": {
+        "colorway": ["#636efa", "#EF553B", "#00cc96", "#ab63fa", "#FFA15A",
+                     "#19d3f3", "#FF6692", "#B6E880", "#FF97FF", "#FECB52"],
+        "font": {"color": "#2a3f5f"},
+        "hovermode": "closest",
+        "paper_bgcolor": "white",
+        "plot_bgcolor": "#E5ECF6",
+        "xaxis": {"gridcolor": "white", "linecolor": "white", "zerolinecolor": "white", "automargin": True},
+        "yaxis": {"gridcolor": "white", "linecolor": "white", "zerolinecolor": "white", "automargin": True},
+    }
+}
+# plotly.express' default continuous scale (Plasma)
+SEQUENTIAL_COLORSCALE = [
+    [0.0, "#0d0887"], [0.1111111111111111, "#46039f"], [0.2222222222222222, "#7201a8"],
+    [0.3333333333333333, "#9c179e"], [0.4444444444444444, "#bd3786"], [0.5555555555555556, "#d8576b"],
+    [0.6666666666666666, "#ed7953"], [0.7777777777777778, "#fb9f3a"], [0.8888888888888888, "#fdca26"],
+    [1.0, "#f0f921"],
+]
+SANKEY_COLORS = [
+    "#003f5c", "#58508d", "#bc5090", "#ffa600", "#2f4b7c",
+    "#ff6361", "#4C78A8", "#54A24B", "#E45756", "#72B7B2"
+]
+
+
+def bar_figure(rows, x, y, title, tickangle=None):
+    """Bar chart of (label, value) rows, coloured by value like px.bar(..., color=y)."""
+    labels = [label for label, _ in rows]
+    values = [value for _, value in rows]
+    layout = {
+        "template": PLOTLY_TEMPLATE,
+        "title": {"text": title},
+        "xaxis": {"title": {"text": x}},
+        "yaxis": {"title": {"text": y}},
+        "coloraxis": {"colorbar": {"title": {"text": y}}, "colorscale": SEQUENTIAL_COLORSCALE},
+        "barmode": "relative",
+    }
+    if tickangle is not None:
+        layout["xaxis"]["tickangle"] = tickangle
+    return {
+        "data": [{
+            "type": "bar",
+            "x": labels,
+            "y": values,
+            "marker": {"color": values, "coloraxis": "coloraxis"},
+            "hovertemplate": f"{x}=%{{x}}<br>{y}=%{{marker.color}}<extra></extra>",
+            "showlegend": False,
+        }],
+        "layout": layout,
+    }
+
+
+def pie_figure(rows, names, values, title):
+    """Pie chart of (label, value) rows, like px.pie(..., names=names, values=values)."""
+    return {
+        "data": [{
+            "type": "pie",
+            "labels": [label for label, _ in rows],
+            "values": [value for _, value in rows],
+            "hovertemplate": f"{names}=%{{label}}<br>{values}=%{{value}}<extra></extra>",
+        }],
+        "layout": {"template": PLOTLY_TEMPLATE, "title": {"text": title}},
+    }
+
+
+def shorten_label(label):
+    if label.endswith(".java"):
+        label = label.replace(".java", "")
+    return label if len(label) <= 25 else f"{label[:10]}...{label[-10:]}"
+
+
+def hex_to_rgba(hex_color, alpha=0.4):
+    hex_color = hex_color.lstrip('#')
+    r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    return f'rgba({r},{g},{b},{alpha})'
+
+
+def sankey_figure(edges, title):
+    """
+    Sankey of (source, target, weight) edges, which the caller has already cut to the ones
+    to draw. Only the nodes those edges touch are created, numbered in first-seen order.
+    """
+    nodes = {}
+    sources, targets, weights = [], [], []
+    for source, target, weight in edges:
+        sources.append(nodes.setdefault(source, len(nodes)))
+        targets.append(nodes.setdefault(target, len(nodes)))
+        weights.append(weight)
+
+    node_colors = [SANKEY_COLORS[i % len(SANKEY_COLORS)] for i in range(len(nodes))]
+    return {
+        "data": [{
+            "type": "sankey",
+            "arrangement": "snap",
+            "node": {
+                "pad": 20,
+                "thickness": 20,
+                "line": {"color": "black", "width": 1.2},
+                "label": [shorten_label(label) for label in nodes],
+                "color": node_colors,
+                "hovertemplate": "%{label}<extra></extra>",
+            },
+            "link": {
+                "source": sources,
+                "target": targets,
+                "value": weights,
+                "color": [hex_to_rgba(node_colors[src], alpha=0.4) for src in sources],
+                "hovertemplate": "📂 From %{source.label}<br>📥 To %{target.label}<br>🔁 Usage: %{value}<extra></extra>",
+            },
+        }],
+        "layout": {
+            "template": PLOTLY_TEMPLATE,
+            "title": {"text": title, "x": 0.5, "xanchor": "center", "font": {"size": 22, "color": "black"}},
+            "font": {"size": 16, "color": "black", "family": "Arial"},
+            "margin": {"l": 10, "r": 10, "t": 90, "b": 40},
+            "height": 800,
+            "paper_bgcolor": "white",
+            "plot_bgcolor": "white",
+        },
+    }
+
+
+# The dashboard charts, by the name main2 serves them under, as builders over an aggregates dict
+CHARTS = {
+    "lib-count": lambda aggregates: bar_figure(aggregates["library_counts"][:10], "Library", "Count", "Top Imports", tickangle=-45),
+    "func-stats": lambda aggregates: bar_figure(aggregates["class_functions"][:10], "Class", "Functions", "Function Count by Class"),
+    "var-stats": lambda aggregates: bar_figure(aggregates["class_variables"][:10], "Class", "Variables", "Variable Count by Class"),
+    # import_edges is already sorted heaviest first
+    "sankey": lambda aggregates: sankey_figure(aggregates["import_edges"][:20], "🔗 Top 20 File-to-Import Dependencies"),
+    # Files collapsed into directories and imports into modules, for repos too big to read per file
+    "sankey-packages": lambda aggregates: sankey_figure(aggregates["package_edges"][:20],
+                                                        "🔗 Top 20 Directory-to-Module Dependencies"),
+    "pie": lambda aggregates: pie_figure(aggregates["library_counts"][:20], "Library", "Count", "🍰 Top 20 Library Imports (Most Used)"),
+}
+
+
+def chart_figure(chart, aggregates):
+    return CHARTS[chart](aggregates)
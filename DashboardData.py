@@ -0,0 +1,72 @@
+"""
+Cached data and figure layer for the Streamlit dashboards.
+
+Streamlit reruns the whole script on every interaction, so everything costly is behind a
+cache keyed by the repo and its version (the RepoStore generation, or the metadata file's
+mtime and size): a rerun costs one version lookup, and a re-extracted repo is picked up on
+the next one. Figures are built per chart, the first time that chart is shown.
+"""
+import os
+
+import streamlit as st
+
+from ChartFigures import chart_figure
+from RepoAggregates import aggregates_path, read_aggregates
+from RepoStore import get_repo_store
+
+# Lifetime (seconds) and entry count of the dashboard caches
+DASHBOARD_CACHE_TTL = int(os.environ.get("DASHBOARD_CACHE_TTL", "3600"))
+DASHBOARD_CACHE_ENTRIES = int(os.environ.get("DASHBOARD_CACHE_ENTRIES", "32"))
+
+
+def repo_version(repo_id, json_file):
+    """Changes whenever the repo is re-extracted; None if there is no data for it."""
+    store = get_repo_store() if repo_id else None
+    generation = store.generation(repo_id) if store else None
+    if generation is not None:
+        return "store", generation
+    for path in (json_file, aggregates_path(json_file)):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        return stat.st_mtime_ns, stat.st_size
+    return None
+
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, max_entries=DASHBOARD_CACHE_ENTRIES, show_spinner=False)
+def load_aggregates(repo_id, json_file, version):
+    # `version` is only part of the cache key
+    store = get_repo_store() if repo_id else None
+    aggregates = store.aggregates(repo_id) if store else None
+    return aggregates if aggregates is not None else read_aggregates(json_file)
+
+
+# cache_resource hands every session the same Figure instead of unpickling a copy on each
+# rerun; st.plotly_chart only reads it, and callers must not modify it either
+@st.cache_resource(ttl=DASHBOARD_CACHE_TTL, max_entries=DASHBOARD_CACHE_ENTRIES * 5, show_spinner=False)
+def load_figure(repo_id, json_file, version, chart):
+    import plotly.graph_objects as go
+    return go.Figure(chart_figure(chart, load_aggregates(repo_id, json_file, version)))
+
+
+# (tab label, subheader, chart) for each dashboard tab
+TABS = [
+    ("📚 Top Libraries", "📚 Most Used Libraries", "lib-count"),
+    ("🔧 Function Stats", "🔧 Classes with Most Functions", "func-stats"),
+    ("📦 Variable Stats", "📦 Classes with Most Variables", "var-stats"),
+    ("🔀 Sankey View", "🔀 File-to-Import Dependency (Sankey)", "sankey"),
+    ("🍰 Library Pie Chart", "🍰 Top 20 Library Import Distribution", "pie"),
+    ("🗂️ Package Sankey", "🗂️ Directory-to-Module Dependency (Sankey)", "sankey-packages"),
+]
+
+
+def show_tabs(repo_id, json_file, version):
+    # With on_change="rerun" only the open tab's body runs, so a chart is built (once, then
+    # cached) and sent only when its tab is viewed
+    tabs = st.tabs([label for label, _, _ in TABS], key="chart_tab", on_change="rerun")
+    for tab, (_, subheader, chart) in zip(tabs, TABS):
+        if tab.open:
+            with tab:
+                st.subheader(subheader)
+                st.plotly_chart(load_figure(repo_id, json_file, version, chart), width="stretch")
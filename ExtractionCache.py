@@ -0,0 +1,136 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Where extractor output is cached between /extractrepo runs ("" disables the cache)
+EXTRACTION_CACHE_PATH = os.environ.get("EXTRACTION_CACHE_PATH", ".extraction_cache.sqlite")
+EXTRACTION_CACHE_MAX_BYTES = int(os.environ.get("EXTRACTION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Buffered changes (new entries and last_used updates) written per transaction
+EXTRACTION_CACHE_FLUSH_EVERY = 256
+
+
+class ExtractionCache:
+    """
+    Persistent, content-addressed cache of extractor output.
+
+    Entries are keyed by (GitLab blob SHA, extractor version, language), so an unchanged
+    file is never fetched or parsed twice, and bumping the extractor version invalidates
+    everything it produced. When the stored payloads exceed max_bytes the least recently
+    used entries are evicted.
+
+    New entries and last_used updates are buffered in memory and written in one short
+    transaction per EXTRACTION_CACHE_FLUSH_EVERY changes (and on commit), so other
+    processes sharing the file are never locked out while an extraction runs.
+    """
+
+    def __init__(self, path=EXTRACTION_CACHE_PATH, max_bytes=EXTRACTION_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}  # key -> (info payload, last_used) not written yet
+        self._touched = {}  # key -> last_used of stored entries read since the last flush
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                blob_id TEXT NOT NULL,
+                extractor_version TEXT NOT NULL,
+                language TEXT NOT NULL,
+                info TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (blob_id, extractor_version, language)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS blobs_last_used ON blobs (last_used)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def get(self, blob_id, extractor_version, language):
+        key = (blob_id, extractor_version, language)
+        with self._lock:
+            if key in self._pending:
+                self.hits += 1
+                return json.loads(self._pending[key][0])
+            # A plain SELECT: reads never open a write transaction
+            row = self._conn.execute(
+                "SELECT info FROM blobs WHERE blob_id = ? AND extractor_version = ? AND language = ?", key,
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            self._maybe_flush()
+            return json.loads(row[0])
+
+    def put(self, blob_id, extractor_version, language, info):
+        with self._lock:
+            self._pending[(blob_id, extractor_version, language)] = (json.dumps(info, separators=(",", ":")), time.time())
+            self._maybe_flush()
+
+    def _maybe_flush(self):
+        if len(self._pending) + len(self._touched) >= EXTRACTION_CACHE_FLUSH_EVERY:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending and not self._touched:
+            return
+        for key, (payload, _) in self._pending.items():
+            old = self._conn.execute(
+                "SELECT size FROM blobs WHERE blob_id = ? AND extractor_version = ? AND language = ?", key,
+            ).fetchone()
+            self._total_bytes += len(payload) - (old[0] if old else 0)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+            [(*key, payload, len(payload), used) for key, (payload, used) in self._pending.items()],
+        )
+        self._conn.executemany(
+            "UPDATE blobs SET last_used = ? WHERE blob_id = ? AND extractor_version = ? AND language = ?",
+            [(used, *key) for key, used in self._touched.items()],
+        )
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+        self._conn.commit()
+        self._pending, self._touched = {}, {}
+
+    def _evict(self):
+        # Drop least recently used entries until we are back under 90% of the budget
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute("SELECT rowid, size FROM blobs ORDER BY last_used").fetchall()
+        doomed = []
+        for rowid, size in rows:
+            if self._total_bytes <= target:
+                break
+            doomed.append((rowid,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM blobs WHERE rowid = ?", doomed)
+
+    def commit(self):
+        """Write out everything buffered so far."""
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache():
+    """Process-wide cache instance, or None when EXTRACTION_CACHE_PATH is empty."""
+    global _cache
+    if not EXTRACTION_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractionCache()
+        return _cache
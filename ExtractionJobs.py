@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from WorkingGetRepoDetails import EXTRACTION_JOB_WORKERS, ExtractionProgress, setup_handler
+
+# Finished jobs (and their results) are dropped this many seconds after completion
+EXTRACTION_JOB_TTL = int(os.environ.get("EXTRACTION_JOB_TTL", "3600"))
+
+
+class ExtractionJob:
+    def __init__(self, project_id, mode):
+        self.id = uuid.uuid4().hex
+        self.project_id = project_id
+        self.mode = mode
+        self.status = "queued"  # queued -> running -> done | failed
+        self.progress = ExtractionProgress()
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "project_id": self.project_id,
+            "mode": self.mode,
+            "status": self.status,
+            "progress": self.progress.to_dict(),
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ExtractionJobManager:
+    """
+    Runs /extractrepo extractions on a dedicated thread pool, so a submission returns a job id
+    immediately instead of holding a request worker and the client connection for minutes.
+    """
+
+    def __init__(self, max_workers=EXTRACTION_JOB_WORKERS, ttl=EXTRACTION_JOB_TTL):
+        self.ttl = ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extract-job")
+
+    def submit(self, token, project_id, mode="files"):
+        job = ExtractionJob(project_id, mode)
+        with self._lock:
+            self._expire()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, token)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def _run(self, job, token):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = setup_handler(token, job.project_id, mode=job.mode, progress=job.progress)
+            job.status = "done"
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,118 @@
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Serialized chart figures kept in memory
+FIGURE_CACHE_ENTRIES = int(os.environ.get("FIGURE_CACHE_ENTRIES", "256"))
+# Bodies smaller than this are sent uncompressed: the headers would cost more than they save
+COMPRESS_MIN_BYTES = 1024
+BROTLI_QUALITY = 9
+
+
+class CachedFigure:
+    """One serialized figure, its strong ETag, and compressed copies made on first request."""
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self._encoded = {}
+
+    def encoded(self, accept_encoding):
+        """(body, content-encoding or None) for a request's Accept-Encoding header."""
+        if len(self.body) < COMPRESS_MIN_BYTES:
+            return self.body, None
+        accepted = {part.split(";")[0].strip().lower() for part in (accept_encoding or "").split(",")}
+        for encoding in ("br", "gzip"):
+            if encoding not in accepted or (encoding == "br" and brotli is None):
+                continue
+            # Racing threads may both compress; either result is the same bytes
+            if encoding not in self._encoded:
+                if encoding == "br":
+                    self._encoded[encoding] = brotli.compress(self.body, quality=BROTLI_QUALITY)
+                else:
+                    self._encoded[encoding] = gzip.compress(self.body, mtime=0)
+            return self._encoded[encoding], encoding
+        return self.body, None
+
+    def etag_for(self, encoding):
+        # Strong ETags name exact bytes, so each encoding gets its own
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def matches(self, if_none_match):
+        """Whether an If-None-Match header names this figure, in any encoding."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag == self.etag or (tag.startswith(self.etag[:-1] + "-") and tag.endswith('"')):
+                return True
+        return False
+
+
+class FigureCache:
+    """
+    LRU of serialized figures keyed by (repo file, chart) and validated against the repo
+    file's version, so a re-extracted repo gets fresh figures and an unchanged one is
+    never rebuilt or re-serialized.
+    """
+
+    def __init__(self, max_entries=FIGURE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (path, chart) -> (version, CachedFigure)
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, body):
+        figure = CachedFigure(body)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (version, figure)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return figure
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": sum(len(figure.body) for _, figure in self._entries.values()),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_figure_cache():
+    """Process-wide figure cache, created on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FigureCache()
+        return _cache
@@ -0,0 +1,261 @@
+"""
+Single-pass Java source scanner used by WorkingGetRepoDetails.extract_java_info.
+
+The source is tokenized once by a master regex whose alternatives never overlap (string,
+char and text-block literals, identifiers, numbers, single-char symbols), with comments and
+whitespace skipped in front of each token, so nothing is ever backtracked over. A small state machine then walks the
+token list, tracking braces to know whether it is at the top level, in a class body or in
+a code block, and tries to read a declaration at the start of each statement. Each attempt
+stops at the next `{`, `}` or `;`, so every token is looked at a bounded number of times
+and the whole scan is linear in the size of the file.
+"""
+import re
+
+# Whitespace and comments are consumed in front of every token; the `\Z` alternative lets
+# trailing whitespace/comments match without backtracking into the skip group.
+_TOKEN_RE = re.compile(r"""
+    (?:\s|//[^\n]*|/\*.*?(?:\*/|\Z))*
+    (
+        \"\"\".*?(?:\"\"\"|\Z)          # text block
+      | "(?:[^"\\\n]|\\.)*"?          # string literal
+      | '(?:[^'\\\n]|\\.)*'?          # char literal
+      | [A-Za-z_$][\w$]*               # identifier / keyword
+      | \d[\w.]*                       # number
+      | .                              # any other single character
+      | \Z
+    )
+""", re.VERBOSE | re.DOTALL)
+
+_IDENT_START = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_$")
+
+MODIFIERS = {
+    "public", "private", "protected", "static", "final", "abstract", "native", "synchronized",
+    "transient", "volatile", "strictfp", "default", "sealed", "non-sealed",
+}
+TYPE_DECLARATIONS = {"class", "interface", "enum", "record"}
+# Words that can start a statement but never a type
+KEYWORDS = {
+    "abstract", "assert", "break", "case", "catch", "class", "continue", "default", "do", "else",
+    "enum", "extends", "finally", "for", "goto", "if", "implements", "import", "instanceof",
+    "interface", "native", "new", "package", "private", "protected", "public", "return", "static",
+    "strictfp", "super", "switch", "synchronized", "this", "throw", "throws", "transient", "try",
+    "volatile", "while", "yield", "true", "false", "null",
+}
+_BOUNDARIES = {"{", "}", ";"}
+
+
+def tokenize(code):
+    """Return the significant tokens of `code` (comments and whitespace dropped) as strings."""
+    tokens = _TOKEN_RE.findall(code)
+    while tokens and not tokens[-1]:
+        tokens.pop()
+    return tokens
+
+
+class JavaScanner:
+    def __init__(self, code):
+        self.tokens = tokenize(code)
+        self.package = None
+        self.imports = []
+        self.classes = []
+        self.methods = []
+        self.fields = []
+        self.locals = []
+
+    def _text(self, i):
+        return self.tokens[i] if i < len(self.tokens) else None
+
+    def _is_ident(self, i):
+        return i < len(self.tokens) and self.tokens[i][0] in _IDENT_START
+
+    def _is_name(self, i):
+        return self._is_ident(i) and self.tokens[i] not in KEYWORDS
+
+    def _qualified_name(self, i):
+        """Read a.b.c (optionally ending in .*) from i; returns (name, next index)."""
+        parts = []
+        while self._is_ident(i) or self._text(i) == "*":
+            parts.append(self._text(i))
+            if self._text(i + 1) != ".":
+                return ".".join(parts), i + 1
+            i += 2
+        return ".".join(parts), i
+
+    def _skip_balanced(self, i, open_, close):
+        """Skip from an opening bracket at i to just past its match; None if a statement boundary comes first."""
+        depth = 0
+        while i < len(self.tokens):
+            text = self._text(i)
+            if text in _BOUNDARIES:
+                return None
+            if text == open_:
+                depth += 1
+            elif text == close:
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+            i += 1
+        return None
+
+    def _skip_type(self, i):
+        """Skip a type (qualified name, type arguments, array dims) from i; None if there is none."""
+        if not self._is_name(i):
+            return None
+        while True:
+            i += 1
+            if self._text(i) == "<":
+                i = self._skip_balanced(i, "<", ">")
+                if i is None:
+                    return None
+            if self._text(i) == "." and self._is_ident(i + 1):
+                i += 1
+                continue
+            break
+        while self._text(i) == "[" and self._text(i + 1) == "]":
+            i += 2
+        return i
+
+    def _method_tail(self, i):
+        """From a '(' at i, check for a parameter list followed by a body, `throws`, or ';'."""
+        i = self._skip_balanced(i, "(", ")")
+        if i is None:
+            return None
+        while self._text(i) == "[" and self._text(i + 1) == "]":
+            i += 2
+        if self._text(i) == "throws":
+            i += 1
+            while self._is_ident(i):
+                _, i = self._qualified_name(i)
+                if self._text(i) != ",":
+                    break
+                i += 1
+        if self._text(i) in ("{", ";", "default"):
+            return i
+        return None
+
+    def _declarators(self, name, i, into):
+        """Record `name` and any further `, other` declarators up to the end of the statement."""
+        into.append(name)
+        depth = 0
+        while i < len(self.tokens):
+            text = self._text(i)
+            if text in _BOUNDARIES:
+                return
+            if text in ("(", "["):
+                depth += 1
+            elif text in (")", "]"):
+                depth -= 1
+            elif text == "," and depth == 0 and self._is_name(i + 1) and self._text(i + 2) in ("=", ";", ",", "["):
+                into.append(self._text(i + 1))
+            i += 1
+
+    def _declaration(self, i, container, class_name):
+        """
+        Try to read a declaration starting at statement start i inside `container`
+        ("top", "class" or "code"). Returns the kind of block a following '{' opens.
+        """
+        text = self._text(i)
+        if container == "top" and text == "package":
+            self.package, _ = self._qualified_name(i + 1)
+            return "code"
+        if container == "top" and text == "import":
+            i += 1
+            if self._text(i) == "static":
+                i += 1
+            name, _ = self._qualified_name(i)
+            if name:
+                self.imports.append(name)
+            return "code"
+
+        # Annotations and modifiers
+        while True:
+            text = self._text(i)
+            if text == "@" and self._is_ident(i + 1) and self._text(i + 1) != "interface":
+                _, i = self._qualified_name(i + 1)
+                if self._text(i) == "(":
+                    i = self._skip_balanced(i, "(", ")")
+                    if i is None:
+                        return "code"
+            elif text in MODIFIERS or (container == "code" and text == "final"):
+                i += 1
+            else:
+                break
+
+        if self._text(i) == "@" and self._text(i + 1) == "interface":
+            i += 1
+        if self._text(i) in TYPE_DECLARATIONS and self._is_name(i + 1):
+            self.classes.append(self._text(i + 1))
+            return ("class", self._text(i + 1))
+
+        if container == "code":
+            end = self._skip_type(i)
+            if end is not None and self._is_name(end) and self._text(end + 1) in ("=", ";", ",", "["):
+                self._declarators(self._text(end), end + 1, self.locals)
+            return "code"
+
+        # Class body: generic method type parameters, then constructor / method / field
+        if self._text(i) == "<":
+            i = self._skip_balanced(i, "<", ">")
+            if i is None:
+                return "code"
+        if self._text(i) == class_name and self._text(i + 1) == "(":
+            if self._method_tail(i + 1) is not None:
+                self.methods.append(class_name)
+            return "code"
+        end = self._skip_type(i)
+        if end is None or not self._is_name(end):
+            return "code"
+        name = self._text(end)
+        if self._text(end + 1) == "(":
+            if self._method_tail(end + 1) is not None:
+                self.methods.append(name)
+        elif self._text(end + 1) in ("=", ";", ",", "["):
+            self._declarators(name, end + 1, self.fields)
+        return "code"
+
+    def scan(self):
+        # Each entry is (container, enclosing class name, paren depth to restore on '}')
+        stack = [("top", None, 0)]
+        at_statement_start = True
+        next_block = None
+        paren_depth = 0
+        for i, text in enumerate(self.tokens):
+            container, class_name, _ = stack[-1]
+            if at_statement_start and paren_depth == 0:
+                at_statement_start = False
+                next_block = self._declaration(i, container, class_name)
+            if text == "{":
+                if isinstance(next_block, tuple):
+                    stack.append(next_block + (paren_depth,))
+                else:
+                    stack.append(("code", class_name, paren_depth))
+                next_block = None
+                paren_depth = 0
+                at_statement_start = True
+            elif text == "}":
+                if len(stack) > 1:
+                    paren_depth = stack.pop()[2]
+                at_statement_start = True
+            elif text == ";" and paren_depth == 0:
+                next_block = None
+                at_statement_start = True
+            elif text == "(":
+                paren_depth += 1
+            elif text == ")":
+                paren_depth = max(paren_depth - 1, 0)
+        return self
+
+    def to_dict(self):
+        return {
+            "package": self.package,
+            "imports": self.imports,
+            "classes": self.classes,
+            "methods": self.methods,
+            "fields": self.fields,
+            "locals": self.locals,
+        }
+
+
+def scan_java(code):
+    """Scan one Java source file; returns package, imports, classes, methods, fields and locals."""
+    return JavaScanner(code).scan().to_dict()
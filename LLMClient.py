@@ -0,0 +1,190 @@
+import asyncio
+import json
+import os
+import random
+import threading
+
+import httpx
+
+# OpenAI-compatible endpoint; point it at a local fake server for offline runs
+LLM_BASE_URL = os.environ.get("LLM_BASE_URL", "https://api.openai.com/v1")
+LLM_API_KEY = os.environ.get("OPENAI_API_KEY", "")
+LLM_MODEL = os.environ.get("LLM_MODEL", "gpt-3.5-turbo")
+# Completions in flight at once, per-call timeout (seconds) and retry budget
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "120"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "5"))
+
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+# Returned by parse_stream_line at the end-of-stream marker
+STREAM_DONE = object()
+
+
+class LLMError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class OpenAIChatBackend:
+    """Builds and parses requests for an OpenAI-compatible /chat/completions endpoint."""
+
+    def __init__(self, base_url=None, api_key=None, model=None,
+                 system_prompt="You are a helpful assistant."):
+        self.base_url = (base_url or LLM_BASE_URL).rstrip("/")
+        self.api_key = api_key if api_key is not None else LLM_API_KEY
+        self.model = model or LLM_MODEL
+        self.system_prompt = system_prompt
+
+    def build_request(self, prompt, max_tokens, temperature, stream=False):
+        """Returns (url, headers, json body) for one completion."""
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        body = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt},
+            ],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        if stream:
+            body["stream"] = True
+        return f"{self.base_url}/chat/completions", headers, body
+
+    def parse_response(self, payload):
+        return payload["choices"][0]["message"]["content"].strip()
+
+    def parse_stream_line(self, line):
+        """Text delta of one server-sent-events line; STREAM_DONE at `data: [DONE]`."""
+        if not line.startswith("data:"):
+            return None
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return STREAM_DONE
+        choices = json.loads(data).get("choices") or [{}]
+        return choices[0].get("delta", {}).get("content")
+
+
+class AsyncLLMClient:
+    """
+    Async completion client shared by all requests: one pooled httpx connection pool, at most
+    `max_concurrency` completions in flight, a timeout per call, and retries with full-jitter
+    exponential backoff on rate limits (honouring Retry-After), 5xx responses and transport
+    errors. The wire format comes from `backend`, so any OpenAI-compatible server works.
+    """
+
+    def __init__(self, backend=None, max_concurrency=LLM_MAX_CONCURRENCY, timeout=LLM_TIMEOUT,
+                 max_retries=LLM_MAX_RETRIES, base_delay=0.5, max_delay=30.0):
+        self.backend = backend or OpenAIChatBackend()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self._http = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def _send(self, url, headers, body, stream=False):
+        """POST with retries until a 200 arrives; with stream=True the body is left unread."""
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                request = self._http.build_request("POST", url, headers=headers, json=body)
+                # httpx timeouts are per socket operation; this bounds the whole call (or, when
+                # streaming, the wait for the response headers)
+                response = await asyncio.wait_for(self._http.send(request, stream=stream), self.timeout)
+            except (asyncio.TimeoutError, httpx.TimeoutException, httpx.TransportError) as e:
+                if attempt == self.max_retries:
+                    raise LLMError(f"LLM request failed: {e!r}") from e
+            else:
+                if response.status_code == 200:
+                    return response
+                if stream:
+                    await response.aread()
+                    await response.aclose()
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    raise LLMError(f"LLM request failed: HTTP {response.status_code} {response.text[:200]}",
+                                   status_code=response.status_code)
+            self.retries += 1
+            await asyncio.sleep(self._backoff(attempt, response))
+
+    async def complete(self, prompt, max_tokens=500, temperature=0.7):
+        url, headers, body = self.backend.build_request(prompt, max_tokens, temperature)
+        async with self._semaphore:
+            response = await self._send(url, headers, body)
+            return self.backend.parse_response(response.json())
+
+    async def stream(self, prompt, max_tokens=500, temperature=0.7):
+        """
+        Async generator of text deltas as the model produces them. Failures before the first
+        byte are retried like complete(); closing the generator (e.g. because the client that
+        asked for it went away) closes the upstream connection and frees the slot.
+        """
+        url, headers, body = self.backend.build_request(prompt, max_tokens, temperature, stream=True)
+        async with self._semaphore:
+            response = await self._send(url, headers, body, stream=True)
+            try:
+                async for line in response.aiter_lines():
+                    delta = self.backend.parse_stream_line(line)
+                    if delta is STREAM_DONE:
+                        break
+                    if delta:
+                        yield delta
+            finally:
+                await response.aclose()
+
+    async def aclose(self):
+        await self._http.aclose()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client():
+    """
+    The shared client for the running event loop (httpx pools and asyncio primitives are
+    loop-bound, so scripts calling asyncio.run repeatedly each get their own).
+    """
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.get(loop)
+        if client is None:
+            # Loops that ended without close_llm_client; their connections died with them and
+            # can no longer be awaited, so the clients are only dropped
+            for stale in [l for l in _clients if l.is_closed()]:
+                del _clients[stale]
+            client = _clients[loop] = AsyncLLMClient()
+        return client
+
+
+async def close_llm_client():
+    """Close the running loop's shared client, if it has one."""
+    with _clients_lock:
+        client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def run_blocking(coro):
+    """asyncio.run for scripts and blocking wrappers: the loop's client is closed before the loop ends."""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await close_llm_client()
+
+    return asyncio.run(main())
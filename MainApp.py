@@ -1,24 +1,161 @@
-from fastapi import FastAPI, Query,Body
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Query,Body, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import Dict
+import asyncio
+import itertools
+import json
+import os
 import uvicorn
-from WorkingGetRepoDetails import setup_handler
-from WokringChatGptSummarizeAgent import summary_handler
+from WorkingGetRepoDetails import GitLabError, setup_handler
+from WokringChatGptSummarizeAgent import prompt_token_report, stream_summary, summary_handler_async
+from SummaryCache import get_summary_cache
+from ExtractionJobs import ExtractionJobManager
 app = FastAPI(title="Simple FastAPI App", description="Takes 2 inputs and returns a JSON", version="1.0.0")
+extraction_jobs = ExtractionJobManager()
+
+# GitLab statuses that describe the caller's input (bad token, unknown project); any
+# other GitLab failure is reported as a bad gateway
+GITLAB_PASSTHROUGH_STATUSES = {401, 403, 404}
+
+
+@app.exception_handler(GitLabError)
+async def gitlab_error_handler(request: Request, exc: GitLabError):
+    status_code = exc.status_code if exc.status_code in GITLAB_PASSTHROUGH_STATUSES else 502
+    return JSONResponse(status_code=status_code, content={"detail": str(exc)})
 
 @app.get("/extractrepo")
-def process_inputs(token: str = Query(...), repojectid: str = Query(...)):
+def process_inputs(token: str = Query(...), repojectid: str = Query(...),
+                   mode: str = Query("files", pattern="^(files|archive)$"),
+                   stream: bool = Query(False)):
     """
     Accepts two query parameters and returns a combined message.
+    mode=archive downloads the repository tar.gz once instead of fetching each file.
+    stream=true returns newline-delimited JSON: one record per file as it is extracted,
+    then a {"project_metadata": ...} trailer.
+    """
+    if stream:
+        records = setup_handler(token, repojectid, mode=mode, stream=True)
+        # Pull the first record before the 200 goes out, so tree and auth failures
+        # still surface as HTTP errors
+        first = next(records)
+        records = itertools.chain([first], records)
+        return StreamingResponse((json.dumps(record) + "\n" for record in records),
+                                 media_type="application/x-ndjson")
+    return setup_handler(token, repojectid, mode=mode)
+
+@app.post("/extractrepo/jobs", status_code=202)
+async def submit_extraction(token: str = Query(...), repojectid: str = Query(...),
+                            mode: str = Query("files", pattern="^(files|archive)$")):
+    """
+    Queues an extraction and returns its job id right away; poll /extractrepo/jobs/{job_id}.
     """
-    return setup_handler(token, repojectid)
+    job = extraction_jobs.submit(token, repojectid, mode=mode)
+    return job.to_dict()
+
+@app.get("/extractrepo/jobs/{job_id}")
+async def extraction_status(job_id: str):
+    """
+    Returns the job status and progress (files total/fetched/parsed/cached).
+    """
+    job = extraction_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job `{job_id}` not found")
+    return job.to_dict()
+
+@app.get("/extractrepo/jobs/{job_id}/result")
+async def extraction_result(job_id: str):
+    """
+    Returns the finished repo_model; 409 while the job is still queued or running.
+    """
+    job = extraction_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job `{job_id}` not found")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=f"Extraction failed: {job.error}")
+    if job.status != "done":
+        return JSONResponse(status_code=409, content=job.to_dict())
+    return job.result
 
 @app.post("/getsummary")
-def submit_data(data: Dict = Body(...)):
+async def submit_data(data: Dict = Body(...)):
     """
     Accepts a dictionary (JSON object) and returns it with a confirmation message.
     """
-    return summary_handler(data)
+    return await summary_handler_async(data)
+
+# Seconds between SSE keep-alive comments while the summary is still being prepared
+SSE_KEEPALIVE = float(os.environ.get("SSE_KEEPALIVE", "5"))
+
+
+def sse_event(data, event=None):
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def summary_events(request, data):
+    """
+    SSE frames for stream_summary: `data: {"delta": ...}` per piece of text, then
+    `event: done` (or `event: error`). The summary runs in its own task; it is cancelled,
+    closing the upstream LLM connection, as soon as the client disconnects. Keep-alive
+    comments during the map/reduce phase both hold proxies open and surface a disconnect.
+    """
+    queue = asyncio.Queue()
+
+    async def produce():
+        try:
+            async for delta in stream_summary(data):
+                await queue.put(("delta", delta))
+            await queue.put(("done", None))
+        except Exception as e:
+            await queue.put(("error", str(e)))
+
+    producer = asyncio.create_task(produce())
+    try:
+        yield ": summarizing\n\n"
+        while True:
+            try:
+                kind, value = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            if kind == "delta":
+                yield sse_event({"delta": value})
+            elif kind == "done":
+                yield sse_event({}, "done")
+                return
+            else:
+                yield sse_event({"error": value}, "error")
+                return
+    finally:
+        producer.cancel()
+
+@app.post("/getsummary/stream")
+async def submit_data_stream(request: Request, data: Dict = Body(...)):
+    """
+    Streams the summary as server-sent events while the model generates it.
+    """
+    return StreamingResponse(
+        summary_events(request, data),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/getsummary/tokens")
+def summary_token_report(data: Dict = Body(...)):
+    """
+    Estimates prompt tokens for the metadata as pretty-printed JSON and in the compact encoding.
+    """
+    return prompt_token_report(data)
+
+@app.get("/getsummary/cache")
+async def summary_cache_stats():
+    """
+    Returns hit/miss counts and sizes for the summary cache.
+    """
+    return await asyncio.to_thread(lambda: get_summary_cache().stats())
 
 if __name__ == "__main__":
     uvicorn.run("MainApp:app", host="127.0.0.1", port=8000, reload=True)
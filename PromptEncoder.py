@@ -0,0 +1,128 @@
+"""
+Compact text encoding of repo metadata for LLM prompts.
+
+Pretty-printed JSON spends most of its tokens on indentation, quotes and the same keys
+repeated for every file. The encoding here is line oriented instead: files are grouped
+under their directory, each file is one line of `|`-separated fields with one-letter
+labels, empty fields are dropped, and imports used by more than one file are listed once
+in a shared table and referenced as #n.
+
+    Project: language=python; dependencies=fastapi, requests
+    Shared imports: #0 os; #1 json
+    Files:
+    pkg/
+      models.py | C: User, Order | F: save, load | I: #0, #1, pkg.db
+"""
+import json
+from collections import Counter
+
+# Scanner findings listed one by one up to this many; beyond it only counts per rule
+FINDINGS_LISTED = 200
+FIELD_LABELS = {"classes": "C", "functions": "F", "variables": "V", "imports": "I"}
+LEGEND = (
+    "Each file line is `name | C: classes | F: functions | V: variables | I: imports`, "
+    "listed under its directory; empty fields are omitted and `#n` refers to the shared import table."
+)
+
+
+def _text(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return ", ".join(_text(v) for v in value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def import_table(files):
+    """Imports used by more than one file, in first-seen order -> their #n reference."""
+    counts = Counter(name for file in files for name in dict.fromkeys(file.get("imports") or ()))
+    # Names as short as their reference aren't worth a table entry
+    shared = [name for name, count in counts.items() if count > 1 and len(name) > 3]
+    return {name: f"#{i}" for i, name in enumerate(shared)}
+
+
+def encode_file(file, language=None, imports=None):
+    """One file as `name | C: ... | F: ...`; `imports` maps shared import names to #n."""
+    name = file.get("file_path", "").rsplit("/", 1)[-1]
+    fields = [name]
+    for key, value in file.items():
+        # A Java file's package is shown as the directory it is listed under (encode_files)
+        if key in ("file_path", "package") or not value or (key == "language" and value == language):
+            continue
+        if key == "imports" and imports:
+            value = [imports.get(v, v) for v in dict.fromkeys(value)]
+        elif isinstance(value, list):
+            value = list(dict.fromkeys(v if isinstance(v, str) else _text(v) for v in value))
+        fields.append(f"{FIELD_LABELS.get(key, key)}: {_text(value)}")
+    return " | ".join(fields)
+
+
+def encode_files(files, language=None, shared_imports=True):
+    """The `Shared imports` table (if any) and the `Files` section, grouped by directory."""
+    imports = import_table(files) if shared_imports else {}
+    by_dir = {}
+    for file in files:
+        directory, _, _ = file.get("file_path", "").rpartition("/")
+        if not directory and file.get("package"):
+            directory = file["package"].replace(".", "/")
+        by_dir.setdefault(directory, []).append(file)
+
+    lines = []
+    if imports:
+        lines.append("Shared imports: " + "; ".join(f"{ref} {name}" for name, ref in imports.items()))
+    lines.append("Files:")
+    for directory, dir_files in by_dir.items():
+        indent = ""
+        if directory:
+            lines.append(f"{directory}/")
+            indent = "  "
+        lines.extend(indent + encode_file(file, language, imports) for file in dir_files)
+    return "\n".join(lines)
+
+
+def _cut(value, max_items):
+    if max_items is None or not isinstance(value, (list, tuple)) or len(value) <= max_items:
+        return _text(value)
+    return f"{_text(value[:max_items])} (+{len(value) - max_items} more)"
+
+
+def encode_project(project_metadata, label="Project", max_items=None):
+    """`label: key=value; ...`; lists longer than `max_items` are cut short with a count of the rest."""
+    # Scanner findings get their own section (encode_findings)
+    return f"{label}: " + "; ".join(f"{k}={_cut(v, max_items)}" for k, v in project_metadata.items() if v and k != "findings")
+
+
+def encode_findings(findings, limit=FINDINGS_LISTED):
+    """
+    Local secret/PHI scanner hits as `path: rule@line, ...`, one line per file; "" if none.
+    Past `limit` findings only the count per rule is given, so a noisy repo can't crowd out
+    the rest of the prompt.
+    """
+    if not findings:
+        return ""
+    if len(findings) > limit:
+        counts = Counter(finding["rule"] for finding in findings)
+        return (f"Local scanner findings ({len(findings)} in {len({f['file_path'] for f in findings})} files): "
+                + ", ".join(f"{rule} x{count}" for rule, count in counts.most_common()))
+    by_file = {}
+    for finding in findings:
+        by_file.setdefault(finding["file_path"], []).append(f"{finding['rule']}@{finding['line']}")
+    return "Local scanner findings (rule@line):\n" + "\n".join(f"{path}: {', '.join(hits)}" for path, hits in by_file.items())
+
+
+def encode_metadata(metadata):
+    """The whole repo model ({"project_metadata", "files", "findings"}) in the compact layout."""
+    if not isinstance(metadata, dict):
+        return json.dumps(metadata, separators=(",", ":"), ensure_ascii=False)
+    project_metadata = metadata.get("project_metadata") or {}
+    sections = [LEGEND]
+    if project_metadata:
+        sections.append(encode_project(project_metadata))
+    extra = {k: v for k, v in metadata.items() if k not in ("project_metadata", "files", "findings") and v}
+    if extra:
+        sections.append(encode_project(extra, "Other"))
+    if metadata.get("files"):
+        sections.append(encode_files(metadata["files"], project_metadata.get("language")))
+    if metadata.get("findings"):
+        sections.append(encode_findings(metadata["findings"]))
+    return "\n".join(sections)
@@ -0,0 +1,166 @@
+"""
+Dashboard aggregates of a repo model, computed in the same pass that writes
+repo_metadata.json and saved next to it as a small sidecar, so the dashboards never have to
+load or walk the full file list.
+
+    {
+      "version": 3,
+      "totals": {"files": ..., "classes": ..., "functions": ..., "variables": ..., "imports": ...},
+      "library_counts": [[library, count], ...],         # by import's last dotted part, most used first
+      "class_functions": [[class, functions], ...],      # classes with the most functions first
+      "class_variables": [[class, variables], ...],
+      "import_edges": [[file_path, import, count], ...], # heaviest file -> import edges first
+      "package_edges": [[package, module, count], ...]   # the same with files collapsed into their
+    }                                                    # Java package or directory, imports into
+                                                         # their module
+
+Lists are cut to the top `top_n` entries (ties keep extraction order), which is more than
+any dashboard shows. Only the package edge counts are held in full while building: there
+are far fewer (package, module) pairs than (file, import) pairs.
+"""
+import heapq
+import json
+import os
+import uuid
+from collections import Counter
+from itertools import count
+
+AGGREGATES_VERSION = 3
+# Entries kept per ranked list in the sidecar
+AGGREGATE_TOP_N = int(os.environ.get("AGGREGATE_TOP_N", "100"))
+
+
+class TopK:
+    """The k largest (score, item) pairs of a stream; earlier items win ties."""
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+        self._seq = count()
+
+    def push(self, score, item):
+        heap = self._heap
+        # Most pushes on a big repo lose to the current minimum; a tie loses to the earlier item
+        if len(heap) >= self.k and score <= heap[0][0]:
+            return
+        entry = (score, -next(self._seq), item)
+        if len(heap) < self.k:
+            heapq.heappush(heap, entry)
+        else:
+            heapq.heapreplace(heap, entry)
+
+    def items(self):
+        """[(item, score), ...], largest first."""
+        return [(item, score) for score, _, item in sorted(self._heap, reverse=True)]
+
+
+def file_package(file):
+    """A file record's Java package (`com.example.util`), else its directory as `dir/sub/`, or `./`."""
+    if file.get("package"):
+        return file["package"]
+    directory = file["file_path"].rpartition("/")[0]
+    return f"{directory}/" if directory else "./"
+
+
+def import_module(name, language=None):
+    """The module an import belongs to: `java.util` for java.util.List, `os` for os.path."""
+    if language == "java":
+        return name.rpartition(".")[0] or name
+    return name.lstrip(".").split(".")[0] or name
+
+
+class AggregateBuilder:
+    """Accumulates the aggregates one file record at a time."""
+
+    def __init__(self, top_n=AGGREGATE_TOP_N):
+        self.top_n = top_n
+        self.totals = Counter()
+        self.library_counts = Counter()
+        self.class_functions = TopK(top_n)
+        self.class_variables = TopK(top_n)
+        self.import_edges = TopK(top_n)
+        self.package_edges = Counter()
+
+    def add(self, file):
+        imports = file.get("imports") or []
+        functions = len(file.get("functions") or [])
+        variables = len(file.get("variables") or [])
+        self.totals.update(files=1, classes=len(file.get("classes") or []), functions=functions,
+                           variables=variables, imports=len(imports))
+        self.library_counts.update(imp.split(".")[-1] for imp in imports)
+        for clazz in file.get("classes") or []:
+            self.class_functions.push(functions, clazz)
+            self.class_variables.push(variables, clazz)
+        # A file appears once, so its edge counts are final here
+        for imp, edge_count in Counter(imports).items():
+            self.import_edges.push(edge_count, (file["file_path"], imp))
+        package = file_package(file)
+        self.package_edges.update((package, import_module(imp, file.get("language"))) for imp in imports)
+
+    def to_dict(self):
+        return {
+            "version": AGGREGATES_VERSION,
+            "totals": {key: self.totals[key] for key in ("files", "classes", "functions", "variables", "imports")},
+            "library_counts": [list(pair) for pair in self.library_counts.most_common(self.top_n)],
+            "class_functions": [list(pair) for pair in self.class_functions.items()],
+            "class_variables": [list(pair) for pair in self.class_variables.items()],
+            "import_edges": [[path, imp, n] for (path, imp), n in self.import_edges.items()],
+            # most_common(n) selects with a bounded heap rather than sorting every pair
+            "package_edges": [[package, module, n] for (package, module), n in self.package_edges.most_common(self.top_n)],
+        }
+
+
+def build_aggregates(files, top_n=AGGREGATE_TOP_N):
+    builder = AggregateBuilder(top_n)
+    for file in files:
+        builder.add(file)
+    return builder.to_dict()
+
+
+def aggregates_path(metadata_path):
+    """Sidecar location for a repo_metadata.json file: `<name>.aggregates.json` next to it."""
+    return f"{os.path.splitext(metadata_path)[0]}.aggregates.json"
+
+
+def write_aggregates(path, aggregates):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(aggregates, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def _load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _is_fresh(sidecar, metadata_path):
+    try:
+        sidecar_mtime = os.stat(sidecar).st_mtime_ns
+    except FileNotFoundError:
+        return False
+    try:
+        return sidecar_mtime >= os.stat(metadata_path).st_mtime_ns
+    except FileNotFoundError:
+        return True
+
+
+def read_aggregates(metadata_path, load_json=_load_json):
+    """
+    The aggregates for a repo_metadata.json file, read from its sidecar. Files extracted
+    before sidecars existed (or changed since, or summarized by an older AGGREGATES_VERSION)
+    get one built from the full model and saved.
+    `load_json(path)` reads a JSON file, e.g. through a RepoModelCache.
+    """
+    sidecar = aggregates_path(metadata_path)
+    if _is_fresh(sidecar, metadata_path):
+        aggregates = load_json(sidecar)
+        # Sidecars written by an older version are rebuilt, unless there is nothing to rebuild from
+        if aggregates.get("version") == AGGREGATES_VERSION or not os.path.exists(metadata_path):
+            return aggregates
+    aggregates = build_aggregates(load_json(metadata_path)["files"])
+    try:
+        write_aggregates(sidecar, aggregates)
+    except OSError:
+        pass  # read-only data dir: serve the aggregates without saving them
+    return aggregates
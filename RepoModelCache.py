@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Parsed repo_metadata.json files kept in memory, bounded by count and by total file size
+REPO_MODEL_CACHE_ENTRIES = int(os.environ.get("REPO_MODEL_CACHE_ENTRIES", "16"))
+REPO_MODEL_CACHE_MAX_BYTES = int(os.environ.get("REPO_MODEL_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+class RepoModelCache:
+    """
+    LRU of parsed repo models keyed by file path and validated against the file's mtime and
+    size, so a re-extracted repo is picked up on the next request and an unchanged one is
+    never parsed twice. Concurrent misses for the same file wait for a single parse.
+    Cached models are shared between requests and must not be mutated.
+    """
+
+    def __init__(self, max_entries=REPO_MODEL_CACHE_ENTRIES, max_bytes=REPO_MODEL_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # path -> ((mtime_ns, size), model)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loading = {}  # path -> lock held while that file is parsed
+
+    def _lookup(self, path, version):
+        entry = self._entries.get(path)
+        if entry is None or entry[0] != version:
+            return None
+        self._entries.move_to_end(path)
+        self.hits += 1
+        return entry[1]
+
+    def get(self, path, load=json.load):
+        """The parsed contents of `path`; raises FileNotFoundError if it doesn't exist."""
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            model = self._lookup(path, version)
+            if model is not None:
+                return model
+            load_lock = self._loading.setdefault(path, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                # Another request may have parsed it while this one waited
+                model = self._lookup(path, version)
+                if model is not None:
+                    return model
+            with open(path) as f:
+                model = load(f)
+            with self._lock:
+                self.misses += 1
+                self._store(path, version, model)
+                self._loading.pop(path, None)
+            return model
+
+    def _store(self, path, version, model):
+        old = self._entries.pop(path, None)
+        if old is not None:
+            self._bytes -= old[0][1]
+        self._entries[path] = (version, model)
+        self._bytes += version[1]
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (old_version, _) = self._entries.popitem(last=False)
+            self._bytes -= old_version[1]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_repo_model_cache():
+    """Process-wide repo model cache, created on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RepoModelCache()
+        return _cache
@@ -0,0 +1,15 @@
+import os
+
+# Where the extractor writes each repo's `{repo_id}repo_metadata.json` (and its aggregates
+# sidecar), and where main2 and the Streamlit dashboards read them from
+REPO_DATA_DIR = os.environ.get("REPO_DATA_DIR", ".")
+# The repo the dashboards show for id=default
+DEFAULT_REPO_ID = os.environ.get("DEFAULT_REPO_ID", "1")
+
+
+def resolve_repo_id(repo_id):
+    return DEFAULT_REPO_ID if repo_id in (None, "default") else str(repo_id)
+
+
+def repo_metadata_path(repo_id):
+    return os.path.join(REPO_DATA_DIR, f"{str(repo_id).replace('/', '_')}repo_metadata.json")
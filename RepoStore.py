@@ -0,0 +1,289 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from RepoAggregates import AGGREGATES_VERSION, build_aggregates
+
+# Where extracted repo models are stored for the dashboards ("" disables the store)
+REPO_STORE_PATH = os.environ.get("REPO_STORE_PATH", ".repo_store.sqlite")
+# File records inserted per executemany batch while an extraction streams in
+REPO_STORE_BATCH_SIZE = 500
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS generations (
+        generation INTEGER PRIMARY KEY AUTOINCREMENT,
+        repo_id TEXT NOT NULL,
+        started_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS repos (
+        repo_id TEXT PRIMARY KEY,
+        generation INTEGER NOT NULL,
+        project_metadata TEXT NOT NULL,
+        findings TEXT NOT NULL,
+        aggregates TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS files (
+        generation INTEGER NOT NULL,
+        seq INTEGER NOT NULL,
+        path TEXT NOT NULL,
+        record TEXT NOT NULL,
+        PRIMARY KEY (generation, seq)
+    );
+    CREATE INDEX IF NOT EXISTS files_path ON files (path, generation);
+    CREATE TABLE IF NOT EXISTS imports (
+        generation INTEGER NOT NULL,
+        seq INTEGER NOT NULL,
+        path TEXT NOT NULL,
+        name TEXT NOT NULL,
+        library TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS imports_generation ON imports (generation);
+    CREATE INDEX IF NOT EXISTS imports_name ON imports (name, generation);
+    CREATE INDEX IF NOT EXISTS imports_library ON imports (library, generation);
+    CREATE TABLE IF NOT EXISTS classes (
+        generation INTEGER NOT NULL,
+        seq INTEGER NOT NULL,
+        path TEXT NOT NULL,
+        name TEXT NOT NULL,
+        functions INTEGER NOT NULL,
+        variables INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS classes_generation ON classes (generation);
+    CREATE INDEX IF NOT EXISTS classes_name ON classes (name, generation);
+"""
+
+
+class RepoStore:
+    """
+    SQLite store of extracted repo models, one row set per repo, with the files' imports
+    and classes broken out into indexed tables for cross-repo queries.
+
+    Each extraction writes its rows under a new generation in small committed batches, and
+    only becomes the repo's current data when `publish` swaps the repo's generation, so
+    readers see either the old model or the new one in full and never block an extraction
+    for longer than one batch. Queries only ever join through `repos.generation`.
+
+    File rows are keyed by their position in the extraction (`seq`), not their path: Java
+    records carry only the file name, so two `Utils.java` files share a path.
+    """
+
+    def __init__(self, path=REPO_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._upgrade()
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def _upgrade(self):
+        """Re-key a store written when files were keyed by (generation, path)."""
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(files)")]
+        if not columns or "seq" in columns:
+            return
+        self._conn.execute("BEGIN")
+        self._conn.execute("ALTER TABLE files RENAME TO files_by_path")
+        self._conn.execute("DROP TABLE imports")
+        self._conn.execute("DROP TABLE classes")
+        for statement in SCHEMA.split(";"):
+            if statement.strip():
+                self._conn.execute(statement)
+        generations = self._conn.execute("SELECT DISTINCT generation FROM files_by_path").fetchall()
+        for generation, in generations:
+            records = self._conn.execute(
+                "SELECT record FROM files_by_path WHERE generation = ? ORDER BY rowid", (generation,)).fetchall()
+            self._write(*self._rows(generation, 0, [json.loads(record) for record, in records]))
+        self._conn.execute("DROP TABLE files_by_path")
+        self._conn.commit()
+
+    def writer(self, repo_id):
+        return RepoStoreWriter(self, str(repo_id))
+
+    def _begin(self, repo_id):
+        with self._lock:
+            generation = self._conn.execute(
+                "INSERT INTO generations (repo_id, started_at) VALUES (?, ?)", (repo_id, time.time())
+            ).lastrowid
+            self._conn.commit()
+            return generation
+
+    @staticmethod
+    def _rows(generation, first_seq, records):
+        files, imports, classes = [], [], []
+        for seq, record in enumerate(records, first_seq):
+            path = record["file_path"]
+            files.append((generation, seq, path, json.dumps(record, separators=(",", ":"))))
+            imports.extend((generation, seq, path, name, name.split(".")[-1])
+                           for name in dict.fromkeys(record.get("imports") or []))
+            functions = len(record.get("functions") or [])
+            variables = len(record.get("variables") or [])
+            classes.extend((generation, seq, path, name, functions, variables) for name in record.get("classes") or [])
+        return files, imports, classes
+
+    def _write(self, files, imports, classes):
+        self._conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?)", files)
+        self._conn.executemany("INSERT INTO imports VALUES (?, ?, ?, ?, ?)", imports)
+        self._conn.executemany("INSERT INTO classes VALUES (?, ?, ?, ?, ?, ?)", classes)
+
+    def _insert(self, generation, first_seq, records):
+        rows = self._rows(generation, first_seq, records)
+        with self._lock:
+            self._write(*rows)
+            self._conn.commit()
+
+    def _publish(self, repo_id, generation, project_metadata, findings, aggregates):
+        """Make `generation` the repo's current data; False if a newer extraction already published."""
+        with self._lock:
+            current = self._conn.execute("SELECT generation FROM repos WHERE repo_id = ?", (repo_id,)).fetchone()
+            if current is not None and current[0] > generation:
+                # Extractions finished out of order: keep the newer data and drop this one's rows
+                self._drop([(generation,)])
+                self._conn.commit()
+                return False
+            self._conn.execute(
+                "INSERT OR REPLACE INTO repos VALUES (?, ?, ?, ?, ?, ?)",
+                (repo_id, generation, json.dumps(project_metadata), json.dumps(findings),
+                 json.dumps(aggregates, separators=(",", ":")), time.time()),
+            )
+            # Earlier generations of this repo, including ones abandoned mid-extraction
+            stale = self._conn.execute(
+                "SELECT generation FROM generations WHERE repo_id = ? AND generation < ?", (repo_id, generation)
+            ).fetchall()
+            self._drop(stale)
+            self._conn.commit()
+            return True
+
+    def _discard(self, generation):
+        with self._lock:
+            self._drop([(generation,)])
+            self._conn.commit()
+
+    def _drop(self, generations):
+        for table in ("files", "imports", "classes", "generations"):
+            self._conn.executemany(f"DELETE FROM {table} WHERE generation = ?", generations)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def repo_ids(self):
+        return [row[0] for row in self._query("SELECT repo_id FROM repos ORDER BY repo_id")]
+
+    def generation(self, repo_id):
+        """The repo's current generation, which changes with every extraction; None if unknown."""
+        rows = self._query("SELECT generation FROM repos WHERE repo_id = ?", (str(repo_id),))
+        return rows[0][0] if rows else None
+
+    def aggregates(self, repo_id):
+        """The repo's dashboard aggregates (see RepoAggregates), or None if unknown."""
+        rows = self._query("SELECT generation, aggregates FROM repos WHERE repo_id = ?", (str(repo_id),))
+        if not rows:
+            return None
+        generation, aggregates = rows[0][0], json.loads(rows[0][1])
+        if aggregates.get("version") != AGGREGATES_VERSION:
+            # Stored by an older AGGREGATES_VERSION: rebuild from the stored files
+            aggregates = build_aggregates(self.load_repo(repo_id)["files"])
+            with self._lock:
+                self._conn.execute("UPDATE repos SET aggregates = ? WHERE repo_id = ? AND generation = ?",
+                                   (json.dumps(aggregates, separators=(",", ":")), str(repo_id), generation))
+                self._conn.commit()
+        return aggregates
+
+    def load_repo(self, repo_id):
+        """The repo model as written to repo_metadata.json, or None if unknown."""
+        rows = self._query("SELECT generation, project_metadata, findings FROM repos WHERE repo_id = ?", (str(repo_id),))
+        if not rows:
+            return None
+        generation, project_metadata, findings = rows[0]
+        files = self._query("SELECT record FROM files WHERE generation = ? ORDER BY seq", (generation,))
+        return {"files": [json.loads(record) for record, in files],
+                "project_metadata": json.loads(project_metadata), "findings": json.loads(findings)}
+
+    def repo_classes(self, repo_id):
+        """[(class, file_path, functions, variables), ...] of one repo, most functions first."""
+        return self._query(
+            "SELECT c.name, c.path, c.functions, c.variables FROM classes c JOIN repos r USING (generation)"
+            " WHERE r.repo_id = ? ORDER BY c.functions DESC, c.name", (str(repo_id),))
+
+    def top_imports(self, limit=20, repo_id=None):
+        """[(library, imports of it), ...] across every repo, or one; a file counts each import once."""
+        where, params = ("WHERE r.repo_id = ?", (str(repo_id), limit)) if repo_id is not None else ("", (limit,))
+        return self._query(
+            "SELECT i.library, COUNT(*) AS n FROM imports i JOIN repos r USING (generation)"
+            f" {where} GROUP BY i.library ORDER BY n DESC, i.library LIMIT ?", params)
+
+    def repos_importing(self, library):
+        """[(repo_id, files importing it), ...] for a library name (`requests`) or full import (`os.path`)."""
+        return self._query(
+            "SELECT r.repo_id, COUNT(DISTINCT i.seq) AS n FROM imports i JOIN repos r USING (generation)"
+            " WHERE i.library = ?1 OR i.name = ?1 GROUP BY r.repo_id ORDER BY n DESC, r.repo_id", (library,))
+
+    def find_class(self, name):
+        """[(repo_id, file_path), ...] of every class called `name`."""
+        return self._query(
+            "SELECT r.repo_id, c.path FROM classes c JOIN repos r USING (generation)"
+            " WHERE c.name = ? ORDER BY r.repo_id, c.path", (name,))
+
+    def find_file(self, path):
+        """[(repo_id, record), ...] of every stored file at `path` (the file name, for Java)."""
+        rows = self._query(
+            "SELECT r.repo_id, f.record FROM files f JOIN repos r USING (generation)"
+            " WHERE f.path = ? ORDER BY r.repo_id, f.seq", (path,))
+        return [(repo_id, json.loads(record)) for repo_id, record in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RepoStoreWriter:
+    """Streams one extraction's file records into the store; nothing is visible until publish()."""
+
+    def __init__(self, store, repo_id, batch_size=REPO_STORE_BATCH_SIZE):
+        self.store = store
+        self.repo_id = repo_id
+        self.batch_size = batch_size
+        self.generation = store._begin(repo_id)
+        self._seq = 0  # position of the next record in this extraction
+        self._batch = []
+        self._done = False
+
+    def add(self, record):
+        self._batch.append(record)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._batch:
+            self.store._insert(self.generation, self._seq, self._batch)
+            self._seq += len(self._batch)
+            self._batch = []
+
+    def publish(self, project_metadata, findings, aggregates):
+        """False (and the rows are dropped) if a later extraction of the repo was published first."""
+        self.flush()
+        self._done = True
+        return self.store._publish(self.repo_id, self.generation, project_metadata, findings, aggregates)
+
+    def discard(self):
+        if not self._done:
+            self.store._discard(self.generation)
+            self._done = True
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_repo_store():
+    """Process-wide store, or None when REPO_STORE_PATH is empty."""
+    global _store
+    if not REPO_STORE_PATH:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = RepoStore()
+        return _store
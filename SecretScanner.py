@@ -0,0 +1,169 @@
+"""
+Local scanner for credentials and PHI-like identifiers in repository files.
+
+Two kinds of rule keep the scan fast without a third-party matcher:
+
+- Rules that start at punctuation or a digit (`-----BEGIN`, `://`, `@`, SSNs, card numbers)
+  are compiled into a single regex, a trie over their literal prefixes whose top-level
+  alternatives each start with a plain character. The regex engine then skips straight to
+  the next occurrence of one of those few characters instead of trying every position.
+- Rules that start at a word (token prefixes like `ghp_`, or `password`, `dob`) would put
+  common letters in that first-character set, so their keywords are located with plain
+  substring searches and the rule's regex is only tried, anchored, where one occurs.
+
+Line numbers are only worked out for the rare positions that match. Findings carry the rule
+and line, never the matched text, so scanning a repo doesn't copy its secrets into
+repo_metadata.json.
+"""
+import os
+import re
+
+# Set SECRET_SCAN=0 to skip the scanner during extraction
+SECRET_SCAN = os.environ.get("SECRET_SCAN", "1") != "0"
+# Bump whenever a rule changes, so findings cached with extractor output are recomputed
+SCANNER_VERSION = "1"
+
+# rule -> (category, literal prefixes, regex following the prefix, chars that may not precede
+# the prefix or None). Prefixes should start with a character that is rare in source code.
+SYMBOL_RULES = {
+    "private_key": ("secret", ["-----BEGIN "],
+                    r"(?:RSA |DSA |EC |OPENSSH |PGP |ENCRYPTED )?PRIVATE KEY(?: BLOCK)?-----", None),
+    "url_credentials": ("secret", ["://"], r"(?<=[a-z0-9+.-]://)[^\s:/@'\"]+:[^\s:/@'\"$]{3,}@[^\s'\"]", None),
+    # SSNs and phone numbers are anchored on their first dash, which is far rarer than a digit
+    "us_ssn": ("phi", ["-"], r"(?<=(?<![\w-])\d{3}-)\d\d-\d{4}(?![\w-])", None),
+    "phone_number": ("phi", ["-"], r"(?<=(?<![\w.-])\d{3}-)\d{3}-\d{4}(?![\w-])", None),
+    "phone_number_parenthesized": ("phi", ["("], r"\d{3}\) ?\d{3}[-. ]\d{4}(?![\w-])", r"\w"),
+    "credit_card": ("phi", ["3", "4", "5", "6"], r"\d{3}(?:[ -]?\d{4}){2}[ -]?\d{1,4}(?![\w-])", r"[\w-]"),
+    "email_address": ("phi", ["@"], r"(?<=[\w.%+-]@)[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}\b", None),
+}
+
+# rule -> (category, keywords, regex tried at each keyword, case-insensitive). Case-insensitive
+# rules search lower-case keywords in, and match lower-case patterns against, the lower-cased text.
+KEYWORD_RULES = {
+    "aws_access_key_id": ("secret", ["AKIA", "ASIA", "AGPA", "AIDA", "AROA"],
+                          r"(?<!\w)A(?:KI|SI|GP|ID|RO)A[0-9A-Z]{16}\b", False),
+    "github_token": ("secret", ["ghp_", "gho_", "ghu_", "ghs_", "ghr_", "github_pat_"],
+                     r"(?<!\w)(?:gh[pousr]_[A-Za-z0-9]{36,}|github_pat_[A-Za-z0-9_]{60,})", False),
+    "gitlab_token": ("secret", ["glpat-"], r"(?<!\w)glpat-[A-Za-z0-9_-]{20,}", False),
+    "slack_token": ("secret", ["xox"], r"(?<!\w)xox[abposr]-[A-Za-z0-9-]{10,}", False),
+    "openai_api_key": ("secret", ["sk-"], r"(?<![\w-])sk-(?:proj-)?[A-Za-z0-9_-]{20,}", False),
+    "google_api_key": ("secret", ["AIza"], r"(?<!\w)AIza[0-9A-Za-z_-]{35}", False),
+    "stripe_key": ("secret", ["sk_live_", "rk_live_"], r"(?<!\w)[rs]k_live_[0-9A-Za-z]{20,}", False),
+    "jwt": ("secret", ["eyJ"], r"(?<![\w.-])eyJ[A-Za-z0-9_-]{10,}\.eyJ[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}", False),
+    # `password = "literal"` style assignments; placeholders like "${DB_PASS}" are skipped
+    "hardcoded_password": ("secret", ["passw", "secret", "apikey", "api_key", "token"],
+                           r"(?:passw(?:or)?d|secret|api_?key|token)\w*[\"']?\s*[:=]\s*[\"'](?![$%{<])[^\"'\s]{6,}[\"']",
+                           True),
+    "medical_record_number": ("phi", ["mrn", "medical"],
+                              r"(?<![a-z])(?:mrn|medical[ _]?record[ _]?(?:number|no))\b[\"']?\s*[:#=]?\s*[\"']?"
+                              r"\d{6,10}\b", True),
+    # "date of birth", dateOfBirth and birth_date all match from "birth"
+    "date_of_birth": ("phi", ["dob", "birth"],
+                      r"(?:(?<![a-z])dob|birth(?:[ _]?date)?)\b[\"']?\s*[:=]\s*[\"']?\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}",
+                      True),
+}
+
+CATEGORIES = {rule: spec[0] for rule, spec in (*SYMBOL_RULES.items(), *KEYWORD_RULES.items())}
+
+
+def _compile(rules):
+    """
+    Build the combined regex as a trie over the literal prefixes, so each position costs one
+    branch per distinct character instead of one attempt per (rule, prefix). Group _<n>
+    marks the rule of a match; it opens only once the whole prefix has matched.
+    """
+    trie, group_rules = {}, []
+    for rule, (_, prefixes, rest, not_before) in rules.items():
+        for prefix in prefixes:
+            node = trie
+            for char in prefix:
+                node = node.setdefault(char, {})
+            guard = rf"(?<!{not_before}.{{{len(prefix)}}})" if not_before else ""
+            node.setdefault(None, []).append(f"(?P<_{len(group_rules)}>{guard}{rest})")
+            group_rules.append(rule)
+
+    def emit(node):
+        # Longer prefixes first, so the more specific rule wins at a shared position
+        parts = [re.escape(char) + emit(child) for char, child in node.items() if char is not None]
+        parts += node.get(None, [])
+        return parts[0] if len(parts) == 1 else "(?:" + "|".join(parts) + ")"
+
+    # Top level stays a bare alternation of literals, which the engine scans for quickly
+    return re.compile("|".join(re.escape(char) + emit(child) for char, child in trie.items())), group_rules
+
+
+_SCAN_RE, _GROUP_RULES = _compile(SYMBOL_RULES)
+_KEYWORD_RES = {rule: (keywords, re.compile(pattern), ignore_case)
+                for rule, (_, keywords, pattern, ignore_case) in KEYWORD_RULES.items()}
+
+
+def _luhn(content, m):
+    digits = [int(c) for c in m.group() if c.isdigit()]
+    checksum = sum(digits[-1::-2]) + sum(sum(divmod(2 * d, 10)) for d in digits[-2::-2])
+    return checksum % 10 == 0
+
+
+def _ssn(content, m):
+    # The match starts at the first dash; the area number is the three digits before it
+    area = content[m.start() - 3:m.start()]
+    group, serial = m.group()[1:].split("-")
+    return area not in ("000", "666") and area[0] != "9" and group != "00" and serial != "0000"
+
+
+# Extra checks, given (content, match), for rules whose pattern alone matches too much
+VALIDATORS = {"credit_card": _luhn, "us_ssn": _ssn}
+
+# Files scanned even though no extractor reads them: configuration, scripts and key material
+SCAN_EXTENSIONS = {
+    ".env", ".properties", ".yml", ".yaml", ".json", ".ini", ".cfg", ".conf", ".toml", ".xml",
+    ".sh", ".sql", ".tf", ".tfvars", ".pem", ".key",
+}
+SCAN_FILE_NAMES = {".env", "Dockerfile", ".npmrc", ".pypirc", "credentials"}
+
+
+def is_scan_target(path):
+    """Whether a non-source file should be fetched just to be scanned."""
+    name = path.rsplit("/", 1)[-1]
+    return name in SCAN_FILE_NAMES or name.startswith(".env.") or os.path.splitext(name)[1] in SCAN_EXTENSIONS
+
+
+def _keyword_matches(text, ignore_case):
+    """(start, rule) for keyword rules, trying each rule's regex only where a keyword occurs."""
+    matches = set()
+    for rule, (keywords, pattern, rule_ignores_case) in _KEYWORD_RES.items():
+        if rule_ignores_case != ignore_case:
+            continue
+        for keyword in keywords:
+            start = text.find(keyword)
+            while start != -1:
+                if pattern.match(text, start):
+                    matches.add((start, rule))
+                start = text.find(keyword, start + 1)
+    return matches
+
+
+def _with_lines(text, matches):
+    findings = []
+    line, pos = 1, 0
+    for start, rule in sorted(matches):
+        line += text.count("\n", pos, start)
+        pos = start
+        findings.append({"line": line, "rule": rule})
+    return findings
+
+
+def scan_text(content):
+    """[{"line", "rule"}, ...] for every match in `content`, in line order."""
+    matches = _keyword_matches(content, False)
+    for m in _SCAN_RE.finditer(content):
+        rule = _GROUP_RULES[int(m.lastgroup[1:])]
+        validate = VALIDATORS.get(rule)
+        if validate is None or validate(content, m):
+            matches.add((m.start(), rule))
+    findings = _with_lines(content, matches)
+    # Positions in the lower-cased copy get their own line count: it can differ in length
+    lowered = content.lower()
+    lowered_findings = _with_lines(lowered, _keyword_matches(lowered, True))
+    if lowered_findings:
+        findings = sorted(findings + lowered_findings, key=lambda f: f["line"])
+    return findings
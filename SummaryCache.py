@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# On-disk tier location ("" keeps the cache in memory only), size budget and entry lifetime
+SUMMARY_CACHE_PATH = os.environ.get("SUMMARY_CACHE_PATH", ".summary_cache.sqlite")
+SUMMARY_CACHE_MAX_BYTES = int(os.environ.get("SUMMARY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+SUMMARY_CACHE_TTL = int(os.environ.get("SUMMARY_CACHE_TTL", str(7 * 24 * 3600)))
+SUMMARY_CACHE_MEMORY_ENTRIES = int(os.environ.get("SUMMARY_CACHE_MEMORY_ENTRIES", "256"))
+
+
+# Record lists whose order depends on which fetch finished first, not on the repo
+UNORDERED_RECORDS = ("files", "findings")
+
+
+def _dumps(value):
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def summary_cache_key(metadata, model, prompt_version):
+    """
+    Hash of the canonical JSON of the metadata plus everything else that shapes the answer.
+    File and finding records are sorted first, so re-extracting an unchanged repo hits.
+    """
+    records = {name: sorted(map(_dumps, metadata[name])) for name in UNORDERED_RECORDS
+               if isinstance(metadata.get(name), list)}
+    canonical = _dumps({**metadata, **records})
+    digest = hashlib.sha256()
+    for part in (model, str(prompt_version), canonical):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """
+    Two-tier cache of LLM summaries: an in-memory LRU in front of a SQLite file. Disk entries
+    expire after `ttl` seconds, and the least recently used are evicted once they exceed
+    `max_bytes`. Disk hits are promoted into memory.
+    """
+
+    def __init__(self, path=SUMMARY_CACHE_PATH, max_bytes=SUMMARY_CACHE_MAX_BYTES, ttl=SUMMARY_CACHE_TTL,
+                 memory_entries=SUMMARY_CACHE_MEMORY_ENTRIES):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()  # key -> (summary, created_at)
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS summaries (
+                    key TEXT PRIMARY KEY,
+                    summary TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used)")
+            self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT summary, created_at FROM summaries WHERE key = ? AND created_at > ?",
+                    (key, now - self.ttl),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key, summary):
+        now = time.time()
+        with self._lock:
+            self._remember(key, summary, now)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?)",
+                    (key, summary, len(summary.encode()), now, now),
+                )
+                self._evict(now)
+                self._conn.commit()
+
+    def _remember(self, key, summary, created_at):
+        self._memory[key] = (summary, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM summaries WHERE created_at <= ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM summaries ORDER BY last_used"):
+            if total <= self.max_bytes * 0.9:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM summaries WHERE key = ?", doomed)
+
+    def stats(self):
+        with self._lock:
+            disk_entries = 0
+            if self._conn is not None:
+                disk_entries = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_summary_cache():
+    """Process-wide summary cache, created on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SummaryCache()
+        return _cache
@@ -1,8 +1,45 @@
-import openai
+import asyncio
 import json
+import os
+from LLMClient import LLM_MODEL, get_llm_client, run_blocking
+from PromptEncoder import (
+    FINDINGS_LISTED, LEGEND, encode_file, encode_files, encode_findings, encode_metadata, encode_project,
+)
+from SummaryCache import get_summary_cache, summary_cache_key
+
+try:
+    import tiktoken
+except ImportError:  # fall back to a characters-per-token estimate
+    tiktoken = None
+
+# The API key, endpoint and model come from OPENAI_API_KEY / LLM_BASE_URL / LLM_MODEL (see LLMClient)
+MODEL = LLM_MODEL
+# Tokens per summary prompt, everything included (gpt-3.5-turbo has a 4k context shared with the answer)
+CHUNK_TOKEN_BUDGET = int(os.environ.get("SUMMARY_CHUNK_TOKENS", "2500"))
+# Most of a map/reduce prompt the project header and findings may take; past it their lists are cut short
+HEADER_BUDGET_SHARE = 0.4
+# Map-step LLM calls in flight at once
+SUMMARY_CONCURRENCY = int(os.environ.get("SUMMARY_CONCURRENCY", "4"))
+PARTIAL_SUMMARY_TOKENS = 300
+FINAL_SUMMARY_TOKENS = 800
+# Part of the summary cache key: bump whenever a prompt template or the chunking changes
+PROMPT_VERSION = "4"
+
+_encoding = None
+
+
+def estimate_tokens(text):
+    """Token count for `text`: exact with tiktoken installed, else ~4 characters per token."""
+    global _encoding
+    if tiktoken is None:
+        return len(text) // 4 + 1
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.encoding_for_model(MODEL)
+        except KeyError:  # a model tiktoken doesn't know, e.g. on another OpenAI-compatible server
+            _encoding = tiktoken.get_encoding("cl100k_base")
+    return len(_encoding.encode(text))
 
-# Set your OpenAI API key here
-openai.api_key = ""  # Replace with your actual API key
 
 def summarize_with_llm(metadata):
     return f"""
@@ -15,33 +52,263 @@ Based on the following data, please summarize:
 4. Any architectural or design observations
 5. Potential areas for improvement or refactoring
 6. Any PHI or sensitive data found , any secrets detected stored in code or configuration files
+   (a local scanner has already checked every file; its findings are listed with the metadata)
 
-Here is the complete project metadata and full file contents:
+Here is the complete project metadata and file structure, in a compact layout:
 
-```json
-{json.dumps(metadata, indent=2)}
-```
+{encode_metadata(metadata)}
 
 Respond with a helpful, concise, and technical project summary.
 """
 
-def chat_with_gpt(prompt):
-    response = openai.ChatCompletion.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": prompt},
-        ],
-        max_tokens=500,
-        temperature=0.7,
+
+def summarize_chunk_prompt(project, files, language, index, total):
+    """Map-step prompt; `project` is the encoded project header (see project_sections)."""
+    return f"""
+You are a senior software architect reviewing part {index} of {total} of a large code base.
+{LEGEND}
+{project}
+
+Here are the files in this part:
+
+{encode_files(files, language)}
+
+Write compact notes on this part only: what these modules do, the key classes and functions,
+technologies used, design observations and improvement ideas. These notes will be merged with
+the notes for the other parts and the local secret/PHI scanner's findings.
+"""
+
+
+def merge_summaries_prompt(project, findings, partial_summaries):
+    """Reduce-step prompt; `project` and `findings` are the encoded sections (see project_sections)."""
+    notes = "\n\n".join(f"### Part {i}\n{summary}" for i, summary in enumerate(partial_summaries, 1))
+    return f"""
+You are a senior software architect. A large code base was reviewed in parts; the notes for
+each part are below, followed by the project-level metadata.
+
+{notes}
+
+{project}
+{findings}
+
+Based on these notes, please summarize the whole project:
+
+1. What the project does (purpose/goal)
+2. Key modules, classes, and functions
+3. Technologies and dependencies used
+4. Any architectural or design observations
+5. Potential areas for improvement or refactoring
+6. Any PHI or sensitive data found , any secrets detected stored in code or configuration files
+   (a local scanner has already checked every file; its findings are listed with the metadata)
+
+Respond with a helpful, concise, and technical project summary.
+"""
+
+
+def project_sections(project_metadata, budget=CHUNK_TOKEN_BUDGET):
+    """
+    (project header, findings section) for the map/reduce prompts. A long dependency list
+    or many findings are cut down until both fit in HEADER_BUDGET_SHARE of `budget`, so
+    every prompt keeps room for its files or partial summaries.
+    """
+    findings = project_metadata.get("findings")
+    for max_items, listed in ((None, FINDINGS_LISTED), (50, 50), (10, 0)):
+        project = encode_project(project_metadata, max_items=max_items)
+        findings_section = encode_findings(findings, listed)
+        if estimate_tokens(project) + estimate_tokens(findings_section) <= budget * HEADER_BUDGET_SHARE:
+            break
+    return project, findings_section
+
+
+def chunk_files(files, budget=CHUNK_TOKEN_BUDGET, language=None):
+    """Greedily pack file records into chunks whose encoded size stays within `budget` tokens."""
+    chunks, current, used = [], [], 0
+    for file in files:
+        cost = estimate_tokens(encode_file(file, language))
+        if current and used + cost > budget:
+            chunks.append(current)
+            current, used = [], 0
+        # A single file over budget still gets a chunk of its own
+        current.append(file)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def fit_chunks(chunks, prompt_tokens, budget):
+    """Halve any chunk whose actual prompt (shared import table included) is over `budget`."""
+    fitted = []
+    for chunk in chunks:
+        if len(chunk) > 1 and prompt_tokens(chunk) > budget:
+            middle = len(chunk) // 2
+            fitted.extend(fit_chunks([chunk[:middle], chunk[middle:]], prompt_tokens, budget))
+        else:
+            fitted.append(chunk)
+    return fitted
+
+
+def plan_chunks(files, project, language, budget=CHUNK_TOKEN_BUDGET):
+    """Split `files` into chunks whose map-step prompts, header included, fit in `budget` tokens."""
+    # The fixed part of every map-step prompt; part numbers are given their widest form
+    header = estimate_tokens(summarize_chunk_prompt(project, [], language, 99999, 99999))
+    chunks = chunk_files(files, max(budget - header, 1), language)
+    return fit_chunks(
+        chunks, lambda chunk: estimate_tokens(summarize_chunk_prompt(project, chunk, language, 99999, 99999)), budget,
     )
-    return response.choices[0].message["content"].strip()
 
-def summary_handler(data):
-    prompt = summarize_with_llm(data)
-    summary = chat_with_gpt(prompt)
+
+def repo_project_metadata(metadata):
+    """project_metadata with the repo model's other top-level keys (e.g. findings) merged in."""
+    project_metadata = dict(metadata.get("project_metadata") or {})
+    project_metadata.update((k, v) for k, v in metadata.items() if k not in ("files", "project_metadata"))
+    return project_metadata
+
+
+def prompt_token_report(metadata, budget=CHUNK_TOKEN_BUDGET):
+    """Estimated prompt tokens with the old pretty-printed JSON vs the compact encoding."""
+    json_tokens = estimate_tokens(json.dumps(metadata, indent=2))
+    compact_tokens = estimate_tokens(encode_metadata(metadata))
+    report = {
+        "json_tokens": json_tokens,
+        "compact_tokens": compact_tokens,
+        "saved_ratio": round(1 - compact_tokens / json_tokens, 3) if json_tokens else 0.0,
+        "prompt_tokens": estimate_tokens(summarize_with_llm(metadata)),
+        "budget": budget,
+    }
+    files = metadata.get("files") if isinstance(metadata, dict) else None
+    report["single_prompt"] = not files or report["prompt_tokens"] <= budget
+    if not report["single_prompt"]:
+        project_metadata = repo_project_metadata(metadata)
+        project, _ = project_sections(project_metadata, budget)
+        report["chunks"] = len(plan_chunks(files, project, project_metadata.get("language"), budget))
+    else:
+        report["chunks"] = 1
+    return report
+
+
+async def chat_with_gpt_async(prompt, max_tokens=500):
+    return await get_llm_client().complete(prompt, max_tokens=max_tokens, temperature=0.7)
+
+
+def chat_with_gpt_stream(prompt, max_tokens=500):
+    """Async iterator of the completion's text as it is generated."""
+    return get_llm_client().stream(prompt, max_tokens=max_tokens, temperature=0.7)
+
+
+def chat_with_gpt(prompt, max_tokens=500):
+    """Blocking wrapper for scripts; request handlers should await chat_with_gpt_async."""
+    return run_blocking(chat_with_gpt_async(prompt, max_tokens))
+
+
+def group_summaries(partials, budget):
+    """Split partial summaries into groups whose notes each fit in `budget` tokens."""
+    groups, current, used = [], [], 0
+    for summary in partials:
+        # Counted with the `### Part n` heading it is listed under
+        cost = estimate_tokens(f"### Part 99999\n{summary}\n\n")
+        # At least two per group, so every round shrinks the list
+        if len(current) >= 2 and used + cost > budget:
+            groups.append(current)
+            current, used = [], 0
+        current.append(summary)
+        used += cost
+    groups.append(current)
+    return groups
+
+
+async def final_summary_prompt(metadata, llm=chat_with_gpt_async, budget=CHUNK_TOKEN_BUDGET,
+                               concurrency=SUMMARY_CONCURRENCY):
+    """
+    The prompt for the call that writes the summary. If the metadata fits in one prompt that
+    is summarize_with_llm; otherwise `files` is split into token-budgeted chunks that are
+    summarized in parallel (map), and the partial summaries are merged (reduce), recursively
+    if the partials themselves don't fit in one prompt. `await llm(prompt, max_tokens)`
+    returns the text of each intermediate call. Every prompt, its project header and
+    findings included, stays within `budget` tokens.
+    """
+    prompt = summarize_with_llm(metadata)
+    files = metadata.get("files") if isinstance(metadata, dict) else None
+    if not files or estimate_tokens(prompt) <= budget:
+        return prompt
+
+    project_metadata = repo_project_metadata(metadata)
+    language = project_metadata.get("language")
+    project, findings = project_sections(project_metadata, budget)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(prompt, max_tokens):
+        async with semaphore:
+            return await llm(prompt, max_tokens)
+
+    chunks = plan_chunks(files, project, language, budget)
+    partials = await asyncio.gather(*(
+        bounded(summarize_chunk_prompt(project, chunk, language, i, len(chunks)), PARTIAL_SUMMARY_TOKENS)
+        for i, chunk in enumerate(chunks, 1)
+    ))
+
+    # Reduce: merge groups of partial summaries until one prompt holds them all
+    notes_budget = budget - estimate_tokens(merge_summaries_prompt(project, findings, []))
+    groups = group_summaries(partials, notes_budget)
+    while len(groups) > 1:
+        partials = await asyncio.gather(*(
+            bounded(merge_summaries_prompt(project, findings, group), PARTIAL_SUMMARY_TOKENS) for group in groups
+        ))
+        groups = group_summaries(partials, notes_budget)
+    return merge_summaries_prompt(project, findings, groups[0])
+
+
+async def map_reduce_summary_async(metadata, llm=chat_with_gpt_async, budget=CHUNK_TOKEN_BUDGET,
+                                   concurrency=SUMMARY_CONCURRENCY):
+    """Summarize metadata of any size; see final_summary_prompt for how large repos are split."""
+    prompt = await final_summary_prompt(metadata, llm, budget, concurrency)
+    return await llm(prompt, FINAL_SUMMARY_TOKENS)
+
+
+def map_reduce_summary(metadata, llm=chat_with_gpt, budget=CHUNK_TOKEN_BUDGET, concurrency=SUMMARY_CONCURRENCY):
+    """Blocking map_reduce_summary_async for a plain `llm(prompt, max_tokens)` callable."""
+    async def run_llm(prompt, max_tokens):
+        return await asyncio.to_thread(llm, prompt, max_tokens)
+
+    if llm is chat_with_gpt:
+        run_llm = chat_with_gpt_async
+    return run_blocking(map_reduce_summary_async(metadata, run_llm, budget, concurrency))
+
+
+async def summary_handler_async(data):
+    # Hashing the metadata and the SQLite cache calls run off the event loop
+    key = await asyncio.to_thread(summary_cache_key, data, MODEL, PROMPT_VERSION)
+    cache = get_summary_cache()
+    summary = await asyncio.to_thread(cache.get, key)
+    if summary is None:
+        summary = await map_reduce_summary_async(data)
+        await asyncio.to_thread(cache.put, key, summary)
     return summary
 
+
+async def stream_summary(data, llm=chat_with_gpt_async, stream_llm=chat_with_gpt_stream):
+    """
+    Async generator of the summary text as it is generated. Map/reduce calls (for large repos)
+    run to completion first and only the final call is streamed; a cached summary comes back
+    as a single piece. The summary is cached only once the stream has finished.
+    """
+    key = await asyncio.to_thread(summary_cache_key, data, MODEL, PROMPT_VERSION)
+    cache = get_summary_cache()
+    summary = await asyncio.to_thread(cache.get, key)
+    if summary is not None:
+        yield summary
+        return
+    prompt = await final_summary_prompt(data, llm)
+    parts = []
+    async for delta in stream_llm(prompt, FINAL_SUMMARY_TOKENS):
+        parts.append(delta)
+        yield delta
+    await asyncio.to_thread(cache.put, key, "".join(parts).strip())
+
+
+def summary_handler(data):
+    return run_blocking(summary_handler_async(data))
+
 # Example usage
 if __name__ == "__main__":
     with open("repo_metadata.json") as f:
@@ -51,8 +318,7 @@ if __name__ == "__main__":
         repo_model['files'][file].pop('imports')
 
 
-    prompt = summarize_with_llm(repo_model)
-    summary = chat_with_gpt(prompt)
+    summary = map_reduce_summary(repo_model)
 
     print(summary)
 
@@ -1,38 +1,194 @@
+import os
+
 GITLAB_TOKEN = ""
 GITLAB_PROJECT_ID = ""  # e.g., "java"
 
 # GITLAB_PROJECT_ID = ""  # e.g., "12345678" python
 
-GITLAB_API_BASE = f"https://gitlab.com/api/v4/projects/{GITLAB_PROJECT_ID}"
-HEADERS = {"PRIVATE-TOKEN": GITLAB_TOKEN}
+GITLAB_URL = os.environ.get("GITLAB_URL", "https://gitlab.com")
 BRANCH = 'master'
 AI_TOKEN = ""
 
 
 import requests
+from requests.adapters import HTTPAdapter
+from http.cookiejar import DefaultCookiePolicy
 import ast
-import os
+import hashlib
+import multiprocessing
 import re
+import tarfile
+import threading
+import uuid
 import xml.etree.ElementTree as ET
 import json
 from urllib.parse import quote
-from collections import Counter
-
-
-def get_repo_tree():
-    url = f"{GITLAB_API_BASE}/repository/tree?recursive=true&per_page=1000"
-    response = requests.get(url, headers=HEADERS)
-    return response.json() if response.status_code == 200 else []
-
-
-def get_file_content(file_path):
-    url = f"{GITLAB_API_BASE}/repository/files/{quote(file_path, safe='')}/raw?ref=master"
-    res = requests.get(url, headers=HEADERS)
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain, islice
+from ExtractionCache import get_extraction_cache
+from JavaScanner import scan_java
+from SecretScanner import SCANNER_VERSION, SECRET_SCAN, is_scan_target, scan_text
+from RepoAggregates import AggregateBuilder, aggregates_path, write_aggregates
+from RepoPaths import repo_metadata_path
+from RepoStore import get_repo_store
+
+# Max number of raw-file requests in flight at once, per extraction
+FETCH_CONCURRENCY = int(os.environ.get("GITLAB_FETCH_CONCURRENCY", "16"))
+# Extractions that may run at the same time; further submissions wait in the queue
+EXTRACTION_JOB_WORKERS = int(os.environ.get("EXTRACTION_JOB_WORKERS", "4"))
+# Keep-alive connections kept per host: enough for every concurrent extraction's fetchers
+# plus its tree listing, so urllib3 doesn't discard (and later re-handshake) the overflow
+GITLAB_POOL_SIZE = int(os.environ.get("GITLAB_POOL_SIZE", str((FETCH_CONCURRENCY + 1) * EXTRACTION_JOB_WORKERS)))
+# Seconds to wait for a GitLab connection, and between bytes of a response, before giving up
+GITLAB_CONNECT_TIMEOUT = float(os.environ.get("GITLAB_CONNECT_TIMEOUT", "10"))
+GITLAB_READ_TIMEOUT = float(os.environ.get("GITLAB_READ_TIMEOUT", "60"))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Shared HTTP session so every GitLab call reuses pooled keep-alive connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            # The session is shared by every project and token, so never keep cookies around
+            _session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=GITLAB_POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+class GitLabError(Exception):
+    """A GitLab request failed, so the extraction cannot produce a complete repo model."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class GitLabClient:
+    """
+    Everything one extraction needs to talk to GitLab: project, token, branch and where to
+    save the result. Each request builds its own client, so extractions for different
+    projects and tokens can run side by side; they only share the pooled HTTP session.
+    """
+
+    def __init__(self, token, project_id, base_url=None, branch=None, output_path="repo_metadata.json"):
+        self.token = token
+        self.project_id = project_id
+        self.branch = branch or BRANCH
+        self.api_base = f"{base_url or GITLAB_URL}/api/v4/projects/{quote(str(project_id), safe='')}"
+        self.headers = {"PRIVATE-TOKEN": token}
+        self.output_path = output_path
+        self.session = get_session()
+
+    def get(self, url, **kwargs):
+        # Without a timeout one hung connection would hold an extraction job forever
+        kwargs.setdefault("timeout", (GITLAB_CONNECT_TIMEOUT, GITLAB_READ_TIMEOUT))
+        return self.session.get(url, headers=self.headers, **kwargs)
+
+
+def default_client():
+    """Client built from the module-level settings, for running this file as a script."""
+    return GitLabClient(GITLAB_TOKEN, GITLAB_PROJECT_ID)
+
+
+# Page size for the repository tree listing (GitLab caps it at 100)
+TREE_PAGE_SIZE = 100
+
+
+def iter_repo_tree(client, per_page=TREE_PAGE_SIZE):
+    """
+    Yield tree entries page by page as GitLab returns them, following keyset pagination
+    (the `Link: rel="next"` header) or, on servers without it, the X-Next-Page header.
+    Raises GitLabError if any page fails.
+    """
+    base = f"{client.api_base}/repository/tree?recursive=true&per_page={per_page}&ref={quote(client.branch)}"
+    url = f"{base}&pagination=keyset"
+    while url:
+        response = client.get(url)
+        if response.status_code != 200:
+            # A missing page would silently truncate the repo, so the whole extraction fails
+            raise GitLabError(f"Failed to list repository tree: HTTP {response.status_code}", response.status_code)
+        yield from response.json()
+
+        next_link = response.links.get("next", {}).get("url")
+        next_page = response.headers.get("X-Next-Page")
+        if next_link:
+            url = next_link
+        elif next_page:
+            url = f"{base}&page={next_page}"
+        else:
+            url = None
+
+
+def get_file_content(client, file_path):
+    url = f"{client.api_base}/repository/files/{quote(file_path, safe='')}/raw?ref={quote(client.branch)}"
+    res = client.get(url)
     return res.text if res.status_code == 200 else None
 
 
-def detect_main_language(files):
-    ext_count = Counter(os.path.splitext(f["path"])[1] for f in files if f["type"] == "blob")
+def fetch_files(client, paths, max_workers=FETCH_CONCURRENCY):
+    """
+    Fetch raw file contents concurrently and yield (path, content) as each one completes.
+    At most 2 * max_workers requests are queued at a time, so `paths` can be a lazy iterable.
+    """
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    pending = {}
+    try:
+        for path in paths:
+            pending[pool.submit(get_file_content, client, path)] = path
+            if len(pending) >= max_workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield pending.pop(fut), fut.result()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield pending.pop(fut), fut.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def git_blob_id(raw):
+    """The SHA-1 git (and GitLab's tree listing) uses as a blob's id."""
+    return hashlib.sha1(b"blob %d\0" % len(raw) + raw).hexdigest()
+
+
+def iter_archive_files(client):
+    """
+    Stream the repository tar.gz and yield (entry, content) for each regular file, where
+    entry looks like a tree entry ({"id", "path", "type"}). The archive is decompressed on
+    the fly; only .py/.java and manifest files are read, everything else is yielded with
+    content and id None.
+    """
+    url = f"{client.api_base}/repository/archive.tar.gz?sha={quote(client.branch)}"
+    with client.get(url, stream=True) as res:
+        if res.status_code != 200:
+            # Raised rather than returned, so the writer and store keep the last good model
+            raise GitLabError(f"Failed to download archive: HTTP {res.status_code}", res.status_code)
+        res.raw.decode_content = True
+        with tarfile.open(fileobj=res.raw, mode="r|gz") as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                # Drop the "<project>-<sha>/" directory GitLab wraps the archive in
+                path = member.name.split("/", 1)[-1]
+                entry = {"id": None, "path": path, "type": "blob"}
+                content = None
+                if path.endswith((".py", ".java") + MANIFEST_FILES) or (SECRET_SCAN and is_scan_target(path)):
+                    raw = archive.extractfile(member).read()
+                    entry["id"] = git_blob_id(raw)
+                    content = raw.decode("utf-8", errors="replace")
+                yield entry, content
+
+
+def main_language(ext_count):
     if ext_count[".py"] >= ext_count[".java"]:
         return "python"
     elif ext_count[".java"] > ext_count[".py"]:
@@ -69,17 +225,19 @@ def extract_python_info(code):
 
 
 def extract_java_info(code):
-    classes = re.findall(r'\bclass\s+(\w+)', code)
-    functions = re.findall(r'(?:public|private|protected)?\s+\w+\s+(\w+)\s*\(.*?\)\s*{', code)
-    variables = re.findall(r'\b(?:int|String|float|double|boolean|char)\s+(\w+)\s*[=;]', code)
-    imports = re.findall(r'import\s+([\w.]+);', code)
-
-    return {
-        "classes": classes,
-        "functions": functions,
-        "variables": variables,
-        "imports": list(set(imports))
+    # Single-pass tokenizer; the old regex set backtracked badly on large generated files
+    scan = scan_java(code)
+
+    info = {
+        "classes": scan["classes"],
+        "functions": scan["methods"],
+        "variables": scan["fields"] + scan["locals"],
+        "imports": list(dict.fromkeys(scan["imports"]))
     }
+    # Java records keep only the file name, so the package is what places the file in the repo
+    if scan["package"]:
+        info["package"] = scan["package"]
+    return info
 
 
 def extract_python_dependencies(content):
@@ -117,13 +275,20 @@ def extract_gradle_dependencies(content):
     return re.findall(r"implementation\s+['\"]([\w\-.:]+)['\"]", content)
 
 
-def find_file(files, filename):
-    pomfileslist = []
-    for f in files:
-        if f["path"].endswith(filename):
-            pomfileslist.append(f["path"])
-    return pomfileslist
+MANIFEST_FILES = ("requirements.txt", "pom.xml", "build.gradle")
+MANIFEST_PARSERS = {
+    "requirements.txt": extract_python_dependencies,
+    "pom.xml": extract_maven_dependencies,
+    "build.gradle": extract_gradle_dependencies,
+}
+
 
+def manifest_name(path):
+    """The dependency manifest `path` is a copy of, or None."""
+    for name in MANIFEST_FILES:
+        if path.endswith(name):
+            return name
+    return None
 
 
 def is_test_file(path):
@@ -131,100 +296,435 @@ def is_test_file(path):
     return any(part.lower() in ["test", "tests", "__tests__"] for part in path.split("/"))
 
 
-def main():
-    files = get_repo_tree()
-    language = detect_main_language(files)
+SOURCE_LANGUAGES = {".py": "python", ".java": "java"}
+# Language of files fetched only for the secret scanner; they produce findings but no record
+SCAN_ONLY = "text"
 
-    repo_model = {
-        "project_metadata": {
-            "language": language,
-            "dependencies": []
-        },
-        "files": []
-    }
 
-    # Filter source files only (skip test folders)
-    source_files = [
-        f for f in files
-        if f["type"] == "blob" and not is_test_file(f["path"])
-    ]
-
-    for f in source_files:
-        path = f["path"]
-        print(f"Processing file: {path}")
-        content = get_file_content(path)
-        if content is None:
-            print(f"❌ Failed to fetch content for {path}")
-            continue
-        if not content:
-            continue
-
-        file_data = {
-            "file_path": path,
-            "language": language,
-            "classes": [],
-            "functions": [],
-            "variables": [],
-            "imports": []
-        }
+def source_language(path):
+    """Language whose extractor handles `path`, or None for non-source files."""
+    return SOURCE_LANGUAGES.get(os.path.splitext(path)[1])
+
+
+# Parse stage: worker processes for the CPU-bound extractors, files per batch sent to a
+# worker, and the repo size (in files to parse) below which parsing stays in-process
+PARSE_WORKERS = int(os.environ.get("EXTRACT_PARSE_WORKERS", str(os.cpu_count() or 1)))
+PARSE_BATCH_SIZE = int(os.environ.get("EXTRACT_PARSE_BATCH_SIZE", "32"))
+PARSE_POOL_MIN_FILES = int(os.environ.get("EXTRACT_PARSE_POOL_MIN_FILES", "200"))
+
+# Bump whenever extractor output changes so cached results from older versions are ignored
+EXTRACTOR_VERSION = "4"
+
 
-        if language == "python" and path.endswith(".py"):
-            info = extract_python_info(content)
-            file_data.update(info)
-            repo_model["files"].append(file_data)
+def cache_version():
+    """
+    Version extractor output is cached under. Findings are cached with it, so it also
+    records whether the scanner ran, and which rules it had.
+    """
+    return f"{EXTRACTOR_VERSION}+scan{SCANNER_VERSION}" if SECRET_SCAN else f"{EXTRACTOR_VERSION}+noscan"
 
-        elif language == "java" and path.endswith(".java"):
-            # extension = path.split(".")[-1]
-            file_data["file_path"] = path.split("/")[-1]
-            info = extract_java_info(content)
-            file_data.update(info)
-            repo_model["files"].append(file_data)
 
-    # Extract dependency list
+def make_file_data(path, language, info):
+    file_data = {
+        "file_path": path,
+        "language": language,
+        "classes": [],
+        "functions": [],
+        "variables": [],
+        "imports": []
+    }
+    if language == "java":
+        # extension = path.split(".")[-1]
+        file_data["file_path"] = path.split("/")[-1]
+    file_data.update(info)
+    return file_data
+
+
+def extract_info(content, language):
     if language == "python":
-        req_paths = find_file(files, "requirements.txt")
-        all_deps = []
-        if req_path:
-            for req_path in req_paths:
-                content = get_file_content(req_path)
-                if content:
-                    all_deps.extend(extract_python_dependencies(content))
-            repo_model["project_metadata"]["dependencies"] = list(set(all_deps))  # Remove duplicates
+        info = extract_python_info(content)
+    elif language == "java":
+        info = extract_java_info(content)
+    else:
+        info = {}
+    # Scanned here so the findings are computed in the parse workers and cached with the blob
+    if SECRET_SCAN:
+        info["findings"] = scan_text(content)
+    return info
+
+
+def extract_batch(batch):
+    """[(content, language), ...] -> [info, ...]. Runs inside parse pool workers."""
+    return [extract_info(content, language) for content, language in batch]
+
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool():
+    """
+    Process pool shared by every extraction, created on first use. Workers are started by a
+    fork server (or spawned), never forked from this process and its fetch and job threads.
+    """
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context(method))
+        return _parse_pool
+
+
+def _reset_parse_pool(pool):
+    """Drop a pool whose worker died, so the next extraction starts a fresh one."""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is pool:
+            _parse_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def parse_files(items, workers=PARSE_WORKERS, batch_size=PARSE_BATCH_SIZE, min_files=PARSE_POOL_MIN_FILES):
+    """
+    Run the extractors over (path, content, language, blob_id) items and yield (item, info)
+    in input order. The first `min_files` items are parsed in-process as they arrive, so
+    small repos never start a pool; anything beyond that is parsed in batches by the shared
+    parse pool, with at most 2 * `workers` batches of this extraction in flight.
+    """
+    items = iter(items)
+    for item in islice(items, min_files):
+        yield item, extract_info(item[1], item[2])
+    if workers <= 1:
+        for item in items:
+            yield item, extract_info(item[1], item[2])
+        return
+    first = next(items, None)
+    if first is None:
+        return
+
+    pool = get_parse_pool()
+    pending = deque()
+    try:
+        for batch in _batched(chain([first], items), batch_size):
+            pending.append((batch, pool.submit(extract_batch, [(item[1], item[2]) for item in batch])))
+            # Bound the batches in flight, and hand back finished ones in submission order
+            while len(pending) > workers * 2 or (pending and pending[0][1].done()):
+                batch, future = pending.popleft()
+                yield from zip(batch, future.result())
+        while pending:
+            batch, future = pending.popleft()
+            yield from zip(batch, future.result())
+    except BrokenProcessPool:
+        _reset_parse_pool(pool)
+        raise
+    finally:
+        # The pool outlives this extraction; don't leave it working on an abandoned one
+        for _, future in pending:
+            future.cancel()
+
+
+class ExtractionProgress:
+    """Counters another thread can poll while an extraction runs."""
+
+    def __init__(self):
+        self.total = 0     # files (sources, manifests, scan-only files) discovered so far
+        self.fetched = 0   # contents downloaded, or read from the archive
+        self.parsed = 0    # files extracted, including cache hits
+        self.cached = 0    # files served from the extraction cache
+
+    def to_dict(self):
+        return {"total": self.total, "fetched": self.fetched, "parsed": self.parsed, "cached": self.cached}
+
+
+def add_manifest(manifests, path, content):
+    """Parse a fetched manifest right away, accumulating its dependencies under the manifest name."""
+    name = manifest_name(path)
+    manifests.setdefault(name, []).extend(MANIFEST_PARSERS[name](content))
+
+
+def extract_dependencies(language, manifests):
+    """
+    manifests maps a manifest file name (requirements.txt, pom.xml, build.gradle) to the
+    dependencies parsed from every copy of it. Returns the de-duplicated dependency list.
+    """
+    all_deps = []
+    if language == "python":
+        all_deps = manifests.get("requirements.txt", [])
 
     elif language == "java":
-        pom_paths = find_file(files, "pom.xml")
-        gradle_paths = find_file(files, "build.gradle")
+        # pom.xml wins over build.gradle when a repo has both
+        if "pom.xml" in manifests:
+            all_deps = manifests["pom.xml"]
+        else:
+            all_deps = manifests.get("build.gradle", [])
 
-        all_deps = []
-        if pom_paths:
-            for req_path in pom_paths:
-                content = get_file_content(req_path)
-                if content:
-                    all_deps.extend(extract_maven_dependencies(content))
-            repo_model["project_metadata"]["dependencies"] = list(set(all_deps))  # Remove duplicates
-        elif gradle_paths:
-            for req_path in gradle_paths:
-                content = get_file_content(req_path)
+    return list(set(all_deps))  # Remove duplicates
+
+
+class ExtractionState:
+    """What the file stages learn about the repo besides the file records themselves."""
+
+    def __init__(self):
+        self.ext_count = Counter()  # blob extensions, for main_language
+        self.manifests = {}
+        self.findings = []          # secret/PHI scanner hits: {"file_path", "line", "rule"}
+        self.cached = deque()       # records served from the cache, waiting to be emitted
+
+    def see_blob(self, path):
+        self.ext_count[os.path.splitext(path)[1]] += 1
+
+    def add_findings(self, path, findings):
+        if SECRET_SCAN:
+            self.findings.extend({"file_path": path, **finding} for finding in findings)
+
+    def drain_cached(self):
+        while self.cached:
+            yield self.cached.popleft()
+
+
+def file_record(state, path, language, info):
+    """Move the file's findings into state; the file record, or None for scan-only files."""
+    state.add_findings(path, info.pop("findings", ()))
+    if language == SCAN_ONLY:
+        return None
+    return make_file_data(path, language, info)
+
+
+def lookup_cached(cache, state, progress, blob_id, path, language):
+    """Queue the record for a blob the cache already knows; False if it has to be fetched and parsed."""
+    info = cache.get(blob_id, cache_version(), language) if cache is not None and blob_id else None
+    if info is None:
+        return False
+    record = file_record(state, path, language, info)
+    if record is not None:
+        state.cached.append(record)
+    progress.cached += 1
+    progress.parsed += 1
+    return True
+
+
+def file_language(path):
+    """Language `path` is parsed as: a source language, SCAN_ONLY, or None to skip it."""
+    if is_test_file(path):
+        return None
+    language = source_language(path)
+    if language is None and SECRET_SCAN and is_scan_target(path):
+        return SCAN_ONLY
+    return language
+
+
+def parsed_records(items, cache, state, progress):
+    """Parse items through the parse stage, caching each result under its blob SHA, and yield file records."""
+    try:
+        for (path, _, language, blob_id), info in parse_files(items):
+            if cache is not None and blob_id:
+                cache.put(blob_id, cache_version(), language, info)
+            progress.parsed += 1
+            yield from state.drain_cached()
+            record = file_record(state, path, language, info)
+            if record is not None:
+                yield record
+        yield from state.drain_cached()
+    finally:
+        # Also when the consumer abandons the stream, so the last batch is kept
+        if cache is not None:
+            cache.commit()
+
+
+def iter_tree_records(client, cache, state, progress):
+    """File records for the per-file mode: paginated tree walk -> concurrent fetch -> parse."""
+    blob_ids = {}
+    languages = {}
+
+    def source_paths():
+        # Tree pages are consumed lazily by fetch_files, so fetching starts with the first page
+        for f in iter_repo_tree(client):
+            path = f["path"]
+            if f["type"] != "blob":
+                continue
+            state.see_blob(path)
+            # Dependency manifests go through the same fetch sweep as the sources
+            if manifest_name(path):
+                progress.total += 1
+                yield path
+                continue
+            # Source files (skipping test folders), plus config files for the secret scanner
+            language = file_language(path)
+            if not language:
+                continue
+            progress.total += 1
+            # Blobs seen in an earlier run are neither fetched nor parsed again
+            if lookup_cached(cache, state, progress, f["id"], path, language):
+                continue
+            blob_ids[path] = f["id"]
+            languages[path] = language
+            yield path
+
+    def fetched():
+        for path, content in fetch_files(client, source_paths()):
+            progress.fetched += 1
+            print(f"Processing file: {path}")
+            if content is None:
+                print(f"❌ Failed to fetch content for {path}")
+                continue
+            if not content:
+                continue
+            if manifest_name(path):
+                add_manifest(state.manifests, path, content)
+                state.add_findings(path, scan_text(content) if SECRET_SCAN else ())
+                continue
+            yield path, content, languages[path], blob_ids.get(path)
+
+    return parsed_records(fetched(), cache, state, progress)
+
+
+def iter_archive_records(client, cache, state, progress):
+    """
+    File records for the archive mode: the repository tar.gz is downloaded once and every
+    member streamed through the extractors in memory instead of one raw-file request each.
+    """
+
+    def members():
+        for entry, content in iter_archive_files(client):
+            path = entry["path"]
+            state.see_blob(path)
+            if manifest_name(path):
+                progress.total += 1
+                progress.fetched += 1
                 if content:
-                    all_deps.extend(extract_gradle_dependencies(content))
-            repo_model["project_metadata"]["dependencies"] = list(set(all_deps))  # Remove duplicates
+                    add_manifest(state.manifests, path, content)
+                    state.add_findings(path, scan_text(content) if SECRET_SCAN else ())
+                continue
+            language = file_language(path)
+            if not language:
+                continue
+            progress.total += 1
+            progress.fetched += 1
+            print(f"Processing file: {path}")
+            if not content:
+                continue
+            if lookup_cached(cache, state, progress, entry["id"], path, language):
+                continue
+            yield path, content, language, entry["id"]
+
+    return parsed_records(members(), cache, state, progress)
+
+
+EXTRACTION_MODES = {"files": iter_tree_records, "archive": iter_archive_records}
+
+
+def iter_extraction(client, mode="files", progress=None):
+    """
+    Yield each file record as soon as it has been extracted, then one trailer record
+    {"project_metadata": {...}, "findings": [...]} once the whole repository has been seen.
+
+    The main language is only known at the end, so every .py and .java file is emitted,
+    each tagged with its own language; the trailer carries the repo's main language and
+    the dependencies of its manifests, and the secret/PHI scanner's findings for every
+    fetched file.
+    """
+    progress = progress or ExtractionProgress()
+    state = ExtractionState()
+    yield from EXTRACTION_MODES[mode](client, get_extraction_cache(), state, progress)
+
+    language = main_language(state.ext_count)
+    yield {
+        "project_metadata": {
+            "language": language,
+            "dependencies": extract_dependencies(language, state.manifests)
+        },
+        "findings": state.findings,
+    }
+
 
-    # Save results
-    with open("repo_metadata.json", "w") as f:
-        json.dump(repo_model, f, indent=2)
-    print("✅ Metadata extraction complete! Saved to repo_metadata.json")
+class RepoModelWriter:
+    """
+    Writes repo_metadata.json one file record at a time, as
+    {"files": [...], "project_metadata": {...}, "findings": [...]}, into a temp file that
+    replaces output_path only once the trailer has been written. The dashboard aggregates
+    are accumulated on the way and saved alongside (see RepoAggregates). With a repo_id,
+    the records are also bulk-inserted into the RepoStore as they pass.
+    """
+
+    def __init__(self, output_path, repo_id=None):
+        self.output_path = output_path
+        # Unique per writer: two extractions of one repo may even share a thread (streamed responses)
+        self.tmp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+        self._f = open(self.tmp_path, "w")
+        self._f.write('{"files": [')
+        self._first = True
+        self.aggregates = AggregateBuilder()
+        store = get_repo_store() if repo_id not in (None, "") else None
+        self.store_writer = store.writer(repo_id) if store else None
+
+    def write(self, record):
+        if "project_metadata" in record:
+            self._f.write('\n],\n"project_metadata": ' + json.dumps(record["project_metadata"], indent=2)
+                          + ',\n"findings": ' + json.dumps(record.get("findings", [])) + "}\n")
+            self._f.close()
+            aggregates = self.aggregates.to_dict()
+            if self.store_writer and not self.store_writer.publish(
+                    record["project_metadata"], record.get("findings", []), aggregates):
+                # A later extraction of this repo finished first; the file keeps its data too
+                os.remove(self.tmp_path)
+                print(f"⚠️ Newer metadata already saved to {self.output_path}; this extraction was dropped")
+                return
+            os.replace(self.tmp_path, self.output_path)
+            # Written second, so the sidecar is never older than the metadata it summarizes
+            write_aggregates(aggregates_path(self.output_path), aggregates)
+            print(f"✅ Metadata extraction complete! Saved to {self.output_path}")
+            return
+        self._f.write(("\n" if self._first else ",\n") + json.dumps(record))
+        self._first = False
+        self.aggregates.add(record)
+        if self.store_writer:
+            self.store_writer.add(record)
+
+    def discard(self):
+        """Drop the partial file (and stored rows) when an extraction is abandoned."""
+        if not self._f.closed:
+            self._f.close()
+            os.remove(self.tmp_path)
+        if self.store_writer:
+            self.store_writer.discard()
+
+
+def iter_extraction_saved(client, mode="files", progress=None):
+    """iter_extraction that also writes every record to client.output_path as it passes through."""
+    writer = RepoModelWriter(client.output_path, repo_id=client.project_id)
+    try:
+        for record in iter_extraction(client, mode, progress):
+            writer.write(record)
+            yield record
+    finally:
+        writer.discard()
+
+
+def main(client=None, progress=None, mode="files"):
+    client = client or default_client()
+    repo_model = {"project_metadata": {}, "files": [], "findings": []}
+    for record in iter_extraction_saved(client, mode, progress):
+        if "project_metadata" in record:
+            repo_model["project_metadata"] = record["project_metadata"]
+            repo_model["findings"] = record["findings"]
+        else:
+            repo_model["files"].append(record)
     return repo_model
-    
-
-def setup_handler(GITLAB_TOKEN1,GITLAB_PROJECT_ID1):
-    global GITLAB_TOKEN, GITLAB_PROJECT_ID, GITLAB_API_BASE, HEADERS, BRANCH, AI_TOKEN
-    GITLAB_TOKEN = GITLAB_TOKEN1
-    GITLAB_PROJECT_ID = GITLAB_PROJECT_ID1
-    GITLAB_API_BASE = f"https://gitlab.com/api/v4/projects/{GITLAB_PROJECT_ID}"
-    HEADERS = {"PRIVATE-TOKEN": GITLAB_TOKEN}
-    BRANCH = 'master'
-    AI_TOKEN = ""
-    return main()
+
+
+def setup_handler(GITLAB_TOKEN1,GITLAB_PROJECT_ID1, mode="files", progress=None, stream=False):
+    # Per-call client instead of module globals, so concurrent requests can't clobber each other
+    client = GitLabClient(GITLAB_TOKEN1, GITLAB_PROJECT_ID1, output_path=repo_metadata_path(GITLAB_PROJECT_ID1))
+    if stream:
+        # Records are produced lazily, as the caller consumes them
+        return iter_extraction_saved(client, mode, progress)
+    return main(client, progress, mode)
 
 
 
@@ -0,0 +1,160 @@
+"""
+Startup time and per-endpoint latency of the main2 dashboard API.
+
+    python -m benchmarks.bench_dashboard --files 5000 --requests 200
+
+Startup is a fresh interpreter importing main2, next to ones importing just FastAPI and
+the pandas/plotly stack the endpoints used to load. Latency is measured in-process
+through the ASGI test client against a synthetic repo model: once with the aggregates
+sidecar missing (built on the first request), then warm, then revalidating with
+If-None-Match, and a whole page's charts as five requests vs. one /data/all. With
+--plotly the same charts are also built the old way, through pandas DataFrames and
+plotly.express, for comparison.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ENDPOINTS = ["/data/lib-count", "/data/func-stats", "/data/var-stats", "/data/sankey", "/data/pie"]
+LIBRARIES = ["os", "json", "re", "typing", "logging", "collections", "requests", "numpy", "pandas",
+             "fastapi", "pydantic", "sqlalchemy", "asyncio", "datetime", "itertools", "functools"]
+
+
+def synthetic_model(n_files, seed=0):
+    rng = random.Random(seed)
+    return {
+        "project_metadata": {"language": "python", "dependencies": ["fastapi"]},
+        "files": [
+            {
+                "file_path": f"pkg{i % 50}/module_{i}.py",
+                "language": "python",
+                "classes": [f"Model{i}", f"Helper{i}"][:rng.randint(0, 2)],
+                "functions": [f"handle_{j}" for j in range(rng.randint(0, 30))],
+                "variables": [f"value_{j}" for j in range(rng.randint(0, 15))],
+                "imports": rng.sample(LIBRARIES, rng.randint(1, 8)) + [f"pkg{rng.randrange(50)}.module_{rng.randrange(n_files)}"],
+            }
+            for i in range(n_files)
+        ],
+        "findings": [],
+    }
+
+
+def import_time(statement, repeat):
+    """Best wall time of a fresh interpreter running `statement`."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True, cwd=os.getcwd())
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def latency(call, n):
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return statistics.median(times) * 1000, times[int(len(times) * 0.95) - 1] * 1000
+
+
+def plotly_figures(aggregates):
+    """The charts as the endpoints built them before ChartFigures."""
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    def lib_count():
+        df = pd.DataFrame(aggregates["library_counts"][:10], columns=["Library", "Count"])
+        fig = px.bar(df, x="Library", y="Count", color="Count", title="Top Imports")
+        fig.update_layout(xaxis_tickangle=-45)
+        return fig.to_json()
+
+    def func_stats():
+        df = pd.DataFrame(aggregates["class_functions"][:10], columns=["Class", "Functions"])
+        return px.bar(df, x="Class", y="Functions", color="Functions", title="Function Count by Class").to_json()
+
+    def sankey():
+        labels = {}
+        edges = [(labels.setdefault(s, len(labels)), labels.setdefault(t, len(labels)), n)
+                 for s, t, n in aggregates["import_edges"][:20]]
+        return go.Figure(go.Sankey(node=dict(label=list(labels)),
+                                   link=dict(source=[e[0] for e in edges], target=[e[1] for e in edges],
+                                             value=[e[2] for e in edges]))).to_json()
+
+    def pie():
+        df = pd.DataFrame(aggregates["library_counts"][:20], columns=["Library", "Count"])
+        return px.pie(df, names="Library", values="Count", title="Top 20").to_json()
+
+    return {"/data/lib-count": lib_count, "/data/func-stats": func_stats, "/data/sankey": sankey, "/data/pie": pie}
+
+
+def run(n_files, n_requests, repeat, compare_plotly):
+    print(f"startup (best of {repeat}):")
+    print(f"  import main2:                {import_time('import main2', repeat) * 1000:8.1f} ms")
+    print(f"  import fastapi (floor):      {import_time('import fastapi', repeat) * 1000:8.1f} ms")
+    print(f"  import pandas + plotly:      {import_time('import pandas, plotly.express, plotly.graph_objects', repeat) * 1000:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ["REPO_DATA_DIR"] = data_dir
+        with open(os.path.join(data_dir, "1repo_metadata.json"), "w") as f:
+            json.dump(synthetic_model(n_files), f)
+
+        from fastapi.testclient import TestClient
+        import main2
+        from RepoAggregates import read_aggregates
+        client = TestClient(main2.app)
+
+        start = time.perf_counter()
+        assert client.get(ENDPOINTS[0], params={"id": "1"}).status_code == 200
+        print(f"\nfirst request, sidecar built from {n_files} files: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        print(f"\nwarm latency over {n_requests} requests (median / p95 ms), response bytes:")
+        for endpoint in ENDPOINTS:
+            med, p95 = latency(lambda: client.get(endpoint, params={"id": "1"}), n_requests)
+            identity = client.get(endpoint, params={"id": "1"}, headers={"Accept-Encoding": "identity"})
+            compressed = client.get(endpoint, params={"id": "1"}, headers={"Accept-Encoding": "br, gzip"})
+            encoding = compressed.headers.get("content-encoding", "identity")
+            print(f"  {endpoint:<18} {med:7.2f} / {p95:7.2f}   {identity.headers['content-length']:>7} plain, "
+                  f"{compressed.headers['content-length']:>7} {encoding}")
+
+        print(f"\npage load, every chart (median / p95 ms):")
+        med, p95 = latency(lambda: [client.get(endpoint, params={"id": "1"}) for endpoint in ENDPOINTS], n_requests)
+        print(f"  {'5 x /data/<chart>':<18} {med:7.2f} / {p95:7.2f}")
+        med, p95 = latency(lambda: client.get("/data/all", params={"id": "1"}), n_requests)
+        batch = client.get("/data/all", params={"id": "1"}, headers={"Accept-Encoding": "br, gzip"})
+        print(f"  {'/data/all':<18} {med:7.2f} / {p95:7.2f}   {batch.headers['content-length']:>7} "
+              f"{batch.headers.get('content-encoding', 'identity')}")
+
+        print(f"\nrevalidation, If-None-Match -> 304 (median / p95 ms):")
+        for endpoint in ENDPOINTS:
+            etag = client.get(endpoint, params={"id": "1"}).headers["etag"]
+            headers = {"If-None-Match": etag}
+            assert client.get(endpoint, params={"id": "1"}, headers=headers).status_code == 304
+            med, p95 = latency(lambda: client.get(endpoint, params={"id": "1"}, headers=headers), n_requests)
+            print(f"  {endpoint:<18} {med:7.2f} / {p95:7.2f}")
+        print(f"\nfigure cache: {main2.get_figure_cache().stats()}")
+
+        if compare_plotly:
+            aggregates = read_aggregates(main2.repo_data_path("1"))
+            print(f"\nfigure build only, pandas + plotly (median / p95 ms):")
+            for endpoint, build in plotly_figures(aggregates).items():
+                med, p95 = latency(build, n_requests)
+                print(f"  {endpoint:<18} {med:7.2f} / {p95:7.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3, help="interpreter starts per import timing")
+    parser.add_argument("--plotly", action="store_true", help="also time the old pandas/plotly figure builds")
+    args = parser.parse_args()
+    run(args.files, args.requests, args.repeat, args.plotly)
@@ -0,0 +1,263 @@
+"""
+End-to-end benchmark: synthetic repos served by the fake GitLab, extracted through
+setup_handler, then read back through the main2 dashboard API.
+
+    python -m benchmarks.bench_e2e --languages python java --sizes 500 2000 --output new.json
+    python -m benchmarks.bench_e2e --sizes 500 2000 --compare old.json
+
+For every language and size it times these stages:
+
+    list_tree            paging through the repository tree
+    extract_<mode>       setup_handler in each extraction mode (files, archive)
+    dashboard_cold       the first /data/all after extraction, building every figure
+    <endpoint>           warm requests to each chart and store endpoint
+    <endpoint>_304       the same requests revalidated with If-None-Match
+
+Extraction stages report seconds, files/s and MB/s, plus the peak Python heap seen by
+tracemalloc in a second, traced run (parse workers run in child processes and are not
+included; --no-memory skips it). Request stages report requests/s and p50/p99 latency.
+Results are written as JSON with --output; --compare prints the change against an
+earlier file, stage by stage.
+
+The extraction cache is disabled and the metadata files and repo store live in a
+temporary directory, so every run starts cold and leaves nothing behind.
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.fake_gitlab import FakeGitLab
+from benchmarks.synthetic_repo import generate_java_repo, generate_python_repo
+
+GENERATORS = {"python": generate_python_repo, "java": generate_java_repo}
+ENDPOINTS = [
+    ("/data/lib-count", {}),
+    ("/data/func-stats", {}),
+    ("/data/var-stats", {}),
+    ("/data/sankey", {}),
+    ("/data/sankey", {"mode": "packages"}),
+    ("/data/pie", {}),
+    ("/data/all", {}),
+]
+STORE_ENDPOINTS = [
+    ("/data/imports/top", {}),
+    ("/data/repo-classes", {}),
+]
+# Larger is better for these metrics; smaller for the rest
+HIGHER_IS_BETTER = {"files_per_s", "requests_per_s"}
+RESULTS_VERSION = 1
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    return sorted_values[max(0, math.ceil(len(sorted_values) * p / 100) - 1)]
+
+
+def request_stats(call, n):
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    total = sum(times)
+    times.sort()
+    return {
+        "requests": n,
+        "requests_per_s": n / total if total else 0.0,
+        "p50_ms": percentile(times, 50) * 1000,
+        "p99_ms": percentile(times, 99) * 1000,
+    }
+
+
+def peak_heap_mb(call):
+    """Peak traced Python allocation while `call` runs, in MB."""
+    tracemalloc.start()
+    try:
+        call()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def quietly(call, *args, **kwargs):
+    """Runs call with stdout discarded; the extractor prints a line per file."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return call(*args, **kwargs)
+
+
+def endpoint_stage(path, params):
+    suffix = "".join(f"?{key}={value}" for key, value in params.items())
+    return path + suffix
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scenario(language, n_files, latency, modes, n_requests, memory):
+    import WorkingGetRepoDetails
+    from fastapi.testclient import TestClient
+    import main2
+
+    scenario = f"{language}-{n_files}"
+    repo_id = scenario
+    results = []
+
+    def record(stage, **metrics):
+        results.append({"scenario": scenario, "stage": stage, **metrics})
+        shown = "  ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                          for key, value in metrics.items())
+        print(f"  {stage:<32} {shown}")
+
+    print(f"\n{scenario}:")
+    files = GENERATORS[language](n_files)
+    source_bytes = sum(len(content.encode()) for content in files.values())
+    with FakeGitLab(files, latency=latency) as server:
+        WorkingGetRepoDetails.GITLAB_URL = server.url
+
+        client = WorkingGetRepoDetails.GitLabClient("token", repo_id)
+        server.request_count = 0
+        start = time.perf_counter()
+        entries = sum(1 for _ in WorkingGetRepoDetails.iter_repo_tree(client))
+        elapsed = time.perf_counter() - start
+        record("list_tree", seconds=elapsed, entries=entries, files_per_s=entries / elapsed,
+               gitlab_requests=server.request_count)
+
+        for mode in modes:
+            server.request_count = 0
+            start = time.perf_counter()
+            repo_model = quietly(WorkingGetRepoDetails.setup_handler, "token", repo_id, mode=mode)
+            elapsed = time.perf_counter() - start
+            metrics = {"seconds": elapsed, "files": len(repo_model["files"]),
+                       "files_per_s": len(repo_model["files"]) / elapsed,
+                       "mb_per_s": source_bytes / 1e6 / elapsed, "gitlab_requests": server.request_count}
+            if memory:
+                metrics["peak_mb"] = peak_heap_mb(
+                    lambda: quietly(WorkingGetRepoDetails.setup_handler, "token", repo_id, mode=mode))
+            record(f"extract_{mode}", **metrics)
+
+    client = TestClient(main2.app)
+    params = {"id": repo_id}
+    start = time.perf_counter()
+    assert client.get("/data/all", params=params).status_code == 200
+    record("dashboard_cold", ms=(time.perf_counter() - start) * 1000)
+
+    for path, extra in ENDPOINTS + STORE_ENDPOINTS:
+        query = {**params, **extra}
+        if path == "/data/imports/top":
+            query = {"repo_id": repo_id}
+        response = client.get(path, params=query, headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200, (path, response.status_code)
+        stats = request_stats(lambda: client.get(path, params=query, headers={"Accept-Encoding": "gzip"}),
+                              n_requests)
+        record(endpoint_stage(path, extra), **stats, response_bytes=len(response.content))
+
+        etag = response.headers.get("etag")
+        if etag:
+            headers = {"Accept-Encoding": "gzip", "If-None-Match": etag}
+            assert client.get(path, params=query, headers=headers).status_code == 304
+            stats = request_stats(lambda: client.get(path, params=query, headers=headers), n_requests)
+            record(endpoint_stage(path, extra) + "_304", **stats)
+    return results
+
+
+def run(languages, sizes, latency, modes, n_requests, memory=True):
+    with tempfile.TemporaryDirectory() as data_dir:
+        # Read at import time, so set before the project modules are first imported
+        os.environ["EXTRACTION_CACHE_PATH"] = ""
+        os.environ["REPO_DATA_DIR"] = data_dir
+        os.environ["REPO_STORE_PATH"] = os.path.join(data_dir, "repo_store.sqlite")
+
+        results = []
+        for language in languages:
+            for n_files in sizes:
+                results.extend(run_scenario(language, n_files, latency, modes, n_requests, memory))
+
+        from RepoStore import get_repo_store
+        get_repo_store().close()
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    rss_unit = 1e6 if sys.platform == "darwin" else 1e3
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "commit": git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "params": {"languages": languages, "sizes": sizes, "latency": latency, "modes": modes,
+                       "requests": n_requests, "memory": memory},
+            "max_rss_mb": usage.ru_maxrss / rss_unit,
+            "max_child_rss_mb": children.ru_maxrss / rss_unit,
+        },
+        "results": results,
+    }
+
+
+def compare(old, new, threshold):
+    """Print every metric shared by both runs; returns the (scenario, stage, metric)s that regressed."""
+    previous = {(row["scenario"], row["stage"]): row for row in old["results"]}
+    regressions = []
+    print(f"\nchange vs. {old['meta'].get('commit') or 'baseline'} (regressions over {threshold:.0f}% marked !):")
+    for row in new["results"]:
+        before = previous.get((row["scenario"], row["stage"]))
+        if before is None:
+            continue
+        for metric, value in row.items():
+            if metric in ("scenario", "stage") or not isinstance(value, (int, float)):
+                continue
+            if metric in ("files", "entries", "requests", "response_bytes", "gitlab_requests") and value == before.get(metric):
+                continue
+            base = before.get(metric)
+            if not base:
+                continue
+            change = (value - base) / base * 100
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = "!" if worse > threshold else " "
+            if flag == "!":
+                regressions.append((row["scenario"], row["stage"], metric))
+            print(f" {flag} {row['scenario']:<14} {row['stage']:<32} {metric:<16} "
+                  f"{base:12.2f} -> {value:12.2f}  {change:+7.1f}%")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--languages", nargs="+", default=["python", "java"], choices=sorted(GENERATORS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[500, 2000], help="source files per repo")
+    parser.add_argument("--latency", type=float, default=0.002, help="fake GitLab latency per request, in seconds")
+    parser.add_argument("--modes", nargs="+", default=["files", "archive"])
+    parser.add_argument("--requests", type=int, default=200, help="requests per dashboard endpoint")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced extraction runs")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 if --compare finds a regression")
+    args = parser.parse_args()
+
+    results = run(args.languages, args.sizes, args.latency, args.modes, args.requests, not args.no_memory)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nresults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
@@ -0,0 +1,46 @@
+"""
+Compare /extractrepo extraction modes (per-file raw fetches vs. one archive download)
+against a local fake GitLab server.
+
+    python -m benchmarks.bench_extract_modes --files 2000 --latency 0.01
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import ExtractionCache
+import WorkingGetRepoDetails
+from benchmarks.fake_gitlab import FakeGitLab
+from benchmarks.synthetic_repo import generate_python_repo
+
+
+def run(n_files, latency, modes, use_cache=False):
+    if not use_cache:
+        # Otherwise every mode after the first is served from the blob cache
+        ExtractionCache.EXTRACTION_CACHE_PATH = ""
+    files = generate_python_repo(n_files)
+    with FakeGitLab(files, latency=latency) as server, tempfile.TemporaryDirectory() as workdir:
+        WorkingGetRepoDetails.GITLAB_URL = server.url
+        cwd = os.getcwd()
+        os.chdir(workdir)  # main() writes repo_metadata.json into the cwd
+        try:
+            for mode in modes:
+                server.request_count = 0
+                start = time.perf_counter()
+                repo_model = WorkingGetRepoDetails.setup_handler("token", "1", mode=mode)
+                elapsed = time.perf_counter() - start
+                print(f"{mode:>8}: {elapsed:8.3f}s  files={len(repo_model['files'])}  "
+                      f"requests={server.request_count}  ({len(repo_model['files']) / elapsed:.0f} files/s)")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.005, help="per-request latency in seconds")
+    parser.add_argument("--modes", nargs="+", default=["files", "archive"])
+    parser.add_argument("--cache", action="store_true", help="keep the extraction cache enabled")
+    args = parser.parse_args()
+    run(args.files, args.latency, args.modes, args.cache)
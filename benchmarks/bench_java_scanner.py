@@ -0,0 +1,74 @@
+"""
+Benchmark the single-pass JavaScanner against the regex set extract_java_info used before.
+
+    python -m benchmarks.bench_java_scanner --methods 5000 --long-line 20000
+"""
+import argparse
+import re
+import time
+
+from JavaScanner import scan_java
+
+
+def legacy_extract_java_info(code):
+    """The regex-based extractor JavaScanner replaced, kept here for comparison."""
+    classes = re.findall(r'\bclass\s+(\w+)', code)
+    functions = re.findall(r'(?:public|private|protected)?\s+\w+\s+(\w+)\s*\(.*?\)\s*{', code)
+    variables = re.findall(r'\b(?:int|String|float|double|boolean|char)\s+(\w+)\s*[=;]', code)
+    imports = re.findall(r'import\s+([\w.]+);', code)
+    return {"classes": classes, "functions": functions, "variables": variables, "imports": list(set(imports))}
+
+
+def generated_class(n_methods):
+    """A large, regular source file like the ones code generators emit."""
+    lines = ["package com.example.generated;", "", "import java.util.List;", "import java.util.Map;", "",
+             "public class Generated {"]
+    for i in range(n_methods):
+        lines += [f"    private int field{i} = {i};",
+                  f"    /** Accessor {i} (see {{@link Generated}}) */",
+                  f"    public int getField{i}(int offset, String label) {{",
+                  f'        String message = "value {{" + label + "}}";',
+                  f"        return field{i} + offset;",
+                  "    }"]
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def long_line_class(n_calls):
+    """
+    A single very long line of `new X(...)` calls and no braces: every call starts a legacy
+    method-regex match whose `.*?` then scans to the end of the line, so it goes quadratic.
+    """
+    calls = " ".join(f"Object v{i} = new Value({i}, label);" for i in range(n_calls))
+    return f"public class LongLine {{\n    static void init() {{\n        {calls}\n    }}\n}}\n"
+
+
+def timed(fn, code, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(code)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(n_methods, long_line, repeat):
+    cases = {
+        f"generated ({n_methods} methods)": generated_class(n_methods),
+        f"long line ({long_line} statements)": long_line_class(long_line),
+    }
+    for name, code in cases.items():
+        mb = len(code) / 1e6
+        legacy = timed(legacy_extract_java_info, code, repeat)
+        scanner = timed(scan_java, code, repeat)
+        print(f"{name:<34} {mb:6.2f} MB  legacy {legacy:8.3f}s ({mb / legacy:7.2f} MB/s)  "
+              f"scanner {scanner:8.3f}s ({mb / scanner:7.2f} MB/s)  x{legacy / scanner:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--methods", type=int, default=5000)
+    parser.add_argument("--long-line", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.methods, args.long_line, args.repeat)
@@ -0,0 +1,82 @@
+"""
+Bulk-insert throughput of the RepoStore and its cross-repo queries, against answering the
+same questions by parsing every repo's repo_metadata.json.
+
+    python -m benchmarks.bench_repo_store --repos 20 --files 2000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from collections import Counter
+
+from RepoAggregates import build_aggregates
+from RepoStore import RepoStore
+from benchmarks.bench_dashboard import synthetic_model
+
+
+def timed(label, call, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<34} {best * 1000:9.2f} ms")
+    return result
+
+
+def scan_files(paths, question):
+    """Answer `question(repo_id, model)` for every repo by parsing its JSON file."""
+    answers = {}
+    for repo_id, path in paths.items():
+        with open(path) as f:
+            answers[repo_id] = question(json.load(f))
+    return answers
+
+
+def run(n_repos, n_files):
+    with tempfile.TemporaryDirectory() as workdir:
+        store = RepoStore(os.path.join(workdir, "store.sqlite"))
+        paths = {}
+        start = time.perf_counter()
+        for i in range(n_repos):
+            model = synthetic_model(n_files, seed=i)
+            writer = store.writer(str(i))
+            for record in model["files"]:
+                writer.add(record)
+            writer.publish(model["project_metadata"], model["findings"], build_aggregates(model["files"]))
+            paths[str(i)] = os.path.join(workdir, f"{i}repo_metadata.json")
+            with open(paths[str(i)], "w") as f:
+                json.dump(model, f)
+        elapsed = time.perf_counter() - start
+        print(f"stored {n_repos} repos x {n_files} files in {elapsed:.2f}s "
+              f"({n_repos * n_files / elapsed:.0f} files/s, including the JSON copies)\n")
+
+        print("top 20 imports across all repos:")
+        from_store = timed("RepoStore.top_imports", lambda: store.top_imports(20))
+        counts = timed("parse every JSON file", lambda: sum(scan_files(paths, lambda m: Counter(
+            imp.split(".")[-1] for file in m["files"] for imp in dict.fromkeys(file["imports"]))).values(), Counter()))
+        assert [n for _, n in from_store] == [n for _, n in counts.most_common(20)]
+
+        print("\nrepos importing `requests`:")
+        timed("RepoStore.repos_importing", lambda: store.repos_importing("requests"))
+        timed("parse every JSON file", lambda: scan_files(paths, lambda m: sum(
+            any(imp.split(".")[-1] == "requests" for imp in file["imports"]) for file in m["files"])))
+
+        print("\none repo's classes:")
+        timed("RepoStore.repo_classes", lambda: store.repo_classes("0"))
+        timed("parse its JSON file", lambda: scan_files({"0": paths["0"]}, lambda m: [
+            clazz for file in m["files"] for clazz in file["classes"]]))
+
+        print("\none repo's dashboard aggregates:")
+        timed("RepoStore.aggregates", lambda: store.aggregates("0"))
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repos", type=int, default=20)
+    parser.add_argument("--files", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.repos, args.files)
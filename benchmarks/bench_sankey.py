@@ -0,0 +1,89 @@
+"""
+Build time, peak memory and payload size of the dashboard Sankey on a large synthetic
+repo: the old way (label every file and import, count every pair, sort them all, ship
+every label) against the streaming top-k edges and the package-level collapse.
+
+    python -m benchmarks.bench_sankey --files 50000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+from ChartFigures import sankey_figure
+from RepoAggregates import TopK, file_package, import_module
+from benchmarks.bench_dashboard import synthetic_model
+
+
+def label_every_node(files, top_n):
+    """The pre-aggregates Sankey: every file and import becomes a node."""
+    label_map, labels = {}, []
+
+    def get_label_index(label):
+        if label not in label_map:
+            label_map[label] = len(labels)
+            labels.append(label)
+        return label_map[label]
+
+    source_indices, target_indices = [], []
+    for file in files:
+        file_idx = get_label_index(file["file_path"])
+        for imp in file["imports"]:
+            source_indices.append(file_idx)
+            target_indices.append(get_label_index(imp))
+    dependency_counter = defaultdict(int)
+    for s, t in zip(source_indices, target_indices):
+        dependency_counter[(s, t)] += 1
+    sorted_links = sorted(dependency_counter.items(), key=lambda x: x[1], reverse=True)[:top_n]
+    return {"data": [{"type": "sankey", "node": {"label": labels},
+                      "link": {"source": [s for (s, _), _ in sorted_links], "target": [t for (_, t), _ in sorted_links],
+                               "value": [n for _, n in sorted_links]}}]}
+
+
+def top_file_edges(files, top_n):
+    """The Sankey half of AggregateBuilder: a bounded heap over file -> import edges."""
+    edges = TopK(top_n)
+    for file in files:
+        for imp, n in Counter(file["imports"]).items():
+            edges.push(n, (file["file_path"], imp))
+    return sankey_figure([(path, imp, n) for (path, imp), n in edges.items()], "Sankey")
+
+
+def top_package_edges(files, top_n):
+    edges = Counter()
+    for file in files:
+        package = file_package(file)
+        edges.update((package, import_module(imp, file.get("language"))) for imp in file["imports"])
+    return sankey_figure([(package, module, n) for (package, module), n in edges.most_common(top_n)], "Sankey")
+
+
+def measure(label, build):
+    # Timed without tracemalloc, whose per-allocation hook would dominate
+    start = time.perf_counter()
+    figure = build()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    build()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    payload = len(json.dumps(figure, separators=(",", ":")))
+    nodes = len(figure["data"][0]["node"]["label"])
+    print(f"  {label:<26} {elapsed * 1000:9.1f} ms  peak {peak / 1e6:7.1f} MB  "
+          f"payload {payload / 1e3:9.1f} KB  nodes {nodes}")
+
+
+def run(n_files, top_n):
+    files = synthetic_model(n_files)["files"]
+    print(f"{n_files} files, top {top_n} links:")
+    measure("label every node", lambda: label_every_node(files, top_n))
+    measure("top-k file -> import", lambda: top_file_edges(files, top_n))
+    measure("top-k directory -> module", lambda: top_package_edges(files, top_n))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=50000)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    run(args.files, args.top)
@@ -0,0 +1,64 @@
+"""
+Rerun latency of the Streamlit dashboards, driven headlessly with streamlit's AppTest
+against a synthetic repo_metadata.json for the default repo.
+
+    python -m benchmarks.bench_streamlit --files 20000 --reruns 20
+
+Reports the first run (aggregates and the first tab's figure built), plain reruns (what
+every widget interaction costs), and switching to each tab for the first and second time.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from DashboardData import TABS
+from benchmarks.bench_dashboard import synthetic_model
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def timed_run(app):
+    start = time.perf_counter()
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    return (time.perf_counter() - start) * 1000
+
+
+def run(n_files, n_reruns):
+    with tempfile.TemporaryDirectory() as workdir:
+        # Read when the app first imports RepoPaths and RepoStore
+        os.environ["REPO_DATA_DIR"] = workdir
+        os.environ["REPO_STORE_PATH"] = ""
+        from RepoPaths import DEFAULT_REPO_ID, repo_metadata_path
+        with open(repo_metadata_path(DEFAULT_REPO_ID), "w") as f:
+            json.dump(synthetic_model(n_files), f)
+        shutil.copy(os.path.join(REPO_ROOT, "StreatLitApp.py"), workdir)
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            app = AppTest.from_file(os.path.join(workdir, "StreatLitApp.py"), default_timeout=60)
+            print(f"first run ({n_files} files, sidecar built): {timed_run(app):8.1f} ms")
+            reruns = [timed_run(app) for _ in range(n_reruns)]
+            print(f"rerun, median of {n_reruns}:               {statistics.median(reruns):8.1f} ms")
+            for visit in ("first", "second"):
+                print(f"\ntab switch, {visit} visit:")
+                for label, _, _ in TABS:
+                    app.session_state["chart_tab"] = label
+                    print(f"  {label:<24} {timed_run(app):8.1f} ms")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+    run(args.files, args.reruns)
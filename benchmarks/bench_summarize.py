@@ -0,0 +1,85 @@
+"""
+Exercise the map-reduce summarizer against a stub LLM: chunk counts, prompt sizes,
+concurrency reached and wall time for synthetic repos of increasing size.
+
+    python -m benchmarks.bench_summarize --files 200 2000 --latency 0.2
+
+With --http the calls go through the real AsyncLLMClient to a local fake completions
+server instead, optionally failing a fraction of them to exercise retries:
+
+    python -m benchmarks.bench_summarize --http --failure-rate 0.2
+"""
+import argparse
+import asyncio
+import time
+
+from LLMClient import AsyncLLMClient, OpenAIChatBackend
+from WokringChatGptSummarizeAgent import (
+    CHUNK_TOKEN_BUDGET, estimate_tokens, map_reduce_summary, map_reduce_summary_async, prompt_token_report,
+)
+from benchmarks.fake_llm_server import FakeLLMServer
+from benchmarks.stub_llm import StubLLM
+
+
+def synthetic_metadata(n_files):
+    return {
+        "project_metadata": {"language": "python", "dependencies": ["fastapi", "requests", "openai"]},
+        "files": [
+            {
+                "file_path": f"pkg{i % 20}/module_{i}.py",
+                "language": "python",
+                "classes": [f"Model{i}", f"Helper{i}"],
+                "functions": [f"handle_{i}_{j}" for j in range(8)],
+                "variables": [f"value_{j}" for j in range(5)],
+                "imports": ["os", "json", f"pkg{i % 20}.shared"],
+            }
+            for i in range(n_files)
+        ],
+    }
+
+
+def run(sizes, latency, budget, concurrency):
+    for n_files in sizes:
+        llm = StubLLM(latency=latency)
+        start = time.perf_counter()
+        map_reduce_summary(synthetic_metadata(n_files), llm=llm, budget=budget, concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+        largest = max(estimate_tokens(p) for p in llm.prompts)
+        report = prompt_token_report(synthetic_metadata(n_files), budget)
+        print(f"{n_files:>6} files: {len(llm.prompts):4d} LLM calls  largest prompt ~{largest} tokens  "
+              f"peak concurrency {llm.max_in_flight}  {elapsed:.2f}s  "
+              f"metadata ~{report['json_tokens']} -> ~{report['compact_tokens']} tokens encoded")
+
+
+async def summarize_over_http(metadata, server, budget, concurrency):
+    client = AsyncLLMClient(OpenAIChatBackend(base_url=server.url, api_key="bench"), base_delay=0.01)
+    try:
+        await map_reduce_summary_async(metadata, llm=client.complete, budget=budget, concurrency=concurrency)
+    finally:
+        await client.aclose()
+    return client.retries
+
+
+def run_http(sizes, latency, budget, concurrency, failure_rate):
+    for n_files in sizes:
+        with FakeLLMServer(latency=latency, failure_rate=failure_rate) as server:
+            start = time.perf_counter()
+            retries = asyncio.run(summarize_over_http(synthetic_metadata(n_files), server, budget, concurrency))
+            elapsed = time.perf_counter() - start
+        print(f"{n_files:>6} files: {len(server.prompts):4d} LLM calls  {retries} retries "
+              f"({server.failures} injected failures)  peak concurrency {server.max_in_flight}  {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, nargs="+", default=[10, 200, 2000])
+    parser.add_argument("--latency", type=float, default=0.1, help="stub LLM seconds per call")
+    parser.add_argument("--budget", type=int, default=CHUNK_TOKEN_BUDGET)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--http", action="store_true", help="use AsyncLLMClient against a fake HTTP server")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of fake server calls that fail")
+    args = parser.parse_args()
+    if args.http:
+        run_http(args.files, args.latency, args.budget, args.concurrency, args.failure_rate)
+    else:
+        run(args.files, args.latency, args.budget, args.concurrency)
@@ -0,0 +1,140 @@
+"""
+Minimal local stand-in for the GitLab v4 repository API, for benchmarks.
+
+Serves one in-memory repository ({path: content}) under any project id:
+
+    /api/v4/projects/<id>/repository/tree        (keyset or offset pagination)
+    /api/v4/projects/<id>/repository/files/<path>/raw
+    /api/v4/projects/<id>/repository/archive.tar.gz
+
+Point WorkingGetRepoDetails.GITLAB_URL at `server.url` to use it.
+"""
+import bisect
+import hashlib
+import io
+import json
+import tarfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, unquote, urlencode, urlparse
+
+
+def git_blob_id(content: bytes) -> str:
+    """The SHA GitLab reports as a blob's `id` in tree listings."""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def build_tree(files):
+    entries, dirs = [], set()
+    for path, content in files.items():
+        parts = path.split("/")
+        for i in range(1, len(parts)):
+            dirs.add("/".join(parts[:i]))
+        entries.append({"id": git_blob_id(content), "name": parts[-1], "type": "blob",
+                        "path": path, "mode": "100644"})
+    for d in dirs:
+        entries.append({"id": hashlib.sha1(d.encode()).hexdigest(), "name": d.split("/")[-1],
+                        "type": "tree", "path": d, "mode": "040000"})
+    return sorted(entries, key=lambda e: e["path"])
+
+
+def build_archive(files, prefix="repo-master"):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for path, content in files.items():
+            info = tarfile.TarInfo(f"{prefix}/{path}")
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return buf.getvalue()
+
+
+class FakeGitLab:
+    def __init__(self, files, latency=0.0, host="127.0.0.1", port=0):
+        """files maps repo path -> str/bytes content; latency (seconds) is added to every response."""
+        self.files = {p: c.encode() if isinstance(c, str) else c for p, c in files.items()}
+        self.latency = latency
+        self.request_count = 0
+        self._tree = build_tree(self.files)
+        self._tree_paths = [e["path"] for e in self._tree]
+        self._archive = build_archive(self.files)
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type="application/json", headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_tree(self, url):
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                per_page = min(int(query.get("per_page", 20)), 100)
+                headers = {}
+                if query.get("pagination") == "keyset":
+                    # The page token is the last path of the previous page
+                    start = bisect.bisect_right(fake._tree_paths, query["page_token"]) if "page_token" in query else 0
+                    page = fake._tree[start:start + per_page]
+                    if start + per_page < len(fake._tree):
+                        query["page_token"] = page[-1]["path"]
+                        headers["Link"] = f'<{fake.url}{url.path}?{urlencode(query)}>; rel="next"'
+                else:
+                    page_no = int(query.get("page", 1))
+                    start = (page_no - 1) * per_page
+                    page = fake._tree[start:start + per_page]
+                    headers["X-Next-Page"] = str(page_no + 1) if start + per_page < len(fake._tree) else ""
+                self._send(200, json.dumps(page).encode(), headers=headers)
+
+            def do_GET(self):
+                fake.request_count += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                url = urlparse(self.path)
+                _, _, rest = url.path.partition("/repository/")
+                if rest == "tree":
+                    self._send_tree(url)
+                elif rest == "archive.tar.gz":
+                    self._send(200, fake._archive, "application/octet-stream")
+                elif rest.startswith("files/") and rest.endswith("/raw"):
+                    path = unquote(rest[len("files/"):-len("/raw")])
+                    if path in fake.files:
+                        self._send(200, fake.files[path], "text/plain; charset=utf-8")
+                    else:
+                        self._send(404, b'{"message":"404 File Not Found"}')
+                else:
+                    self._send(404, b'{"message":"404 Not Found"}')
+
+        return Handler
@@ -0,0 +1,140 @@
+"""
+Minimal local stand-in for an OpenAI-compatible chat completions API, for benchmarks.
+
+    POST /v1/chat/completions
+
+Every call waits `latency` seconds and answers with a fixed-size note; with "stream": true
+the note is sent as server-sent events, one word every `token_latency` seconds, and streams
+the client abandons are counted in `disconnects`. A `failure_rate` fraction of calls is
+answered with 429 (with Retry-After) or 500 instead, to exercise the client's retries.
+Point LLMClient.LLM_BASE_URL (or the LLM_BASE_URL env var) at `server.url`.
+"""
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class FakeLLMServer:
+    def __init__(self, latency=0.05, failure_rate=0.0, retry_after=0.01, answer_words=60, seed=0,
+                 token_latency=0.01, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.disconnects = 0
+        self.failure_rate = failure_rate
+        self.retry_after = retry_after
+        self.answer_words = answer_words
+        self.request_count = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.prompts = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def answer(self, max_tokens):
+        return " ".join(f"note{i}" for i in range(min(self.answer_words, max_tokens)))
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload, headers=None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_stream(self, request, content):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                words = content.split(" ")
+                try:
+                    for i, word in enumerate(words):
+                        chunk = {"object": "chat.completion.chunk", "model": request.get("model"),
+                                 "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}}]}
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                        self.wfile.flush()
+                        if fake.token_latency:
+                            time.sleep(fake.token_latency)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    with fake._lock:
+                        fake.disconnects += 1
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path.rstrip("/") != "/v1/chat/completions":
+                    self._send(404, {"error": {"message": "not found"}})
+                    return
+                with fake._lock:
+                    fake.request_count += 1
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                    fail = fake._random.random() < fake.failure_rate
+                    if fail:
+                        fake.failures += 1
+                    else:
+                        fake.prompts.append(request["messages"][-1]["content"])
+                try:
+                    if fail:
+                        if fake._random.random() < 0.5:
+                            self._send(429, {"error": {"message": "rate limited"}},
+                                       headers={"Retry-After": str(fake.retry_after)})
+                        else:
+                            self._send(500, {"error": {"message": "server error"}})
+                        return
+                    if fake.latency:
+                        time.sleep(fake.latency)
+                    content = fake.answer(request.get("max_tokens", 500))
+                    if request.get("stream"):
+                        self._send_stream(request, content)
+                        return
+                    self._send(200, {
+                        "object": "chat.completion",
+                        "model": request.get("model"),
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": content}}],
+                    })
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+        return Handler
@@ -0,0 +1,30 @@
+"""Offline stand-in for chat_with_gpt, for exercising the summarizer without an API key."""
+import threading
+import time
+
+
+class StubLLM:
+    """
+    Callable with chat_with_gpt's signature. Each call sleeps `latency` seconds and answers
+    with a fixed-size note; it records every prompt and the peak number of calls in flight.
+    """
+
+    def __init__(self, latency=0.05, answer_words=60):
+        self.latency = latency
+        self.answer_words = answer_words
+        self.prompts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt, max_tokens=500):
+        with self._lock:
+            self.prompts.append(prompt)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            return " ".join(f"note{i}" for i in range(min(self.answer_words, max_tokens)))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
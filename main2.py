@@ -1,175 +1,176 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse
-import plotly.graph_objects as go
-import plotly.express as px
-from collections import defaultdict
-import pandas as pd
+from fastapi.responses import HTMLResponse, Response
+import asyncio
 import json
 import os
-import uvicorn
+from ChartFigures import CHARTS, chart_figure
+from FigureCache import get_figure_cache
+from RepoModelCache import get_repo_model_cache
+from RepoAggregates import aggregates_path, read_aggregates
+from RepoPaths import repo_metadata_path, resolve_repo_id
+from RepoStore import get_repo_store
 
 app = FastAPI()
-templates = Jinja2Templates(directory="templates")
-
-BASE_PATH = "/Users/amitsingh/Desktop/deek/fastapiselenium/111111gitlabproject"
-
-def load_repo_data(repo_id: str):
-    json_file = os.path.join('/Users/amitsingh/Desktop/deek/fastapiselenium/111111gitlabproject/fastapicharts/data/1repo_metadata.json')
-    if not os.path.exists(json_file):
-        raise HTTPException(status_code=404, detail=f"File `{json_file}` not found")
-    with open(json_file) as f:
-        repo_model = json.load(f)
-    return repo_model['files']
+_templates = None
+
+def get_templates():
+    # Jinja2 is only imported once the HTML page is first requested; the chart endpoints don't need it
+    global _templates
+    if _templates is None:
+        from fastapi.templating import Jinja2Templates
+        _templates = Jinja2Templates(directory="templates")
+    return _templates
+
+def repo_data_path(repo_id):
+    # Where the extractor saved the repo (see RepoPaths.REPO_DATA_DIR)
+    return repo_metadata_path(resolve_repo_id(repo_id))
+
+def repo_data_version(repo_id):
+    # Figures are rebuilt when the repo is re-extracted; a sidecar alone is enough to serve them
+    store = get_repo_store()
+    generation = store.generation(resolve_repo_id(repo_id)) if store else None
+    if generation is not None:
+        return "store", generation
+    json_file = repo_data_path(repo_id)
+    for path in (json_file, aggregates_path(json_file)):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        return stat.st_mtime_ns, stat.st_size
+    raise HTTPException(status_code=404, detail=f"File `{json_file}` not found")
 
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request, id: str = "default"):
     # Render main page template, pass repo_id
-    return templates.TemplateResponse("dashboard.html", {"request": request, "repo_id": id})
-
-@app.get("/data/lib-count")
-async def lib_count(id: str = "default"):
-    file_data_list = load_repo_data(1)
+    return get_templates().TemplateResponse("dashboard.html", {"request": request, "repo_id": id})
+
+def load_aggregates(repo_id):
+    # Computed at extraction time, so the charts never need the full file list
+    store = get_repo_store()
+    aggregates = store.aggregates(resolve_repo_id(repo_id)) if store else None
+    if aggregates is not None:
+        return aggregates
+    json_file = repo_data_path(repo_id)
+    try:
+        return read_aggregates(json_file, load_json=get_repo_model_cache().get)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"File `{json_file}` not found")
 
-    library_count = defaultdict(int)
-    for file in file_data_list:
-        for imp in file["imports"]:
-            imp = imp.split(".")[-1]
-            library_count[imp] += 1
+def serialize(data):
+    return json.dumps(data, separators=(",", ":")).encode()
+
+def build_chart(repo_id, chart):
+    return serialize(chart_figure(chart, load_aggregates(repo_id)))
+
+def build_charts(repo_id, charts):
+    # One load of the aggregates for every chart in the batch
+    aggregates = load_aggregates(repo_id)
+    return serialize({chart: chart_figure(chart, aggregates) for chart in charts})
+
+async def cached_response(request: Request, repo_id: str, key: str, build, *args):
+    """
+    The serialized result of `build(repo_id, *args)`, built once per repo version and
+    cached under `key`. Browsers revalidate with If-None-Match and get a bodiless 304
+    while it is unchanged.
+    """
+    repo_id = resolve_repo_id(repo_id)
+    version = await asyncio.to_thread(repo_data_version, repo_id)
+    cache = get_figure_cache()
+    figure = cache.get((repo_id, key), version)
+    if figure is None:
+        figure = cache.put((repo_id, key), version, await asyncio.to_thread(build, repo_id, *args))
+
+    body, encoding = figure.encoded(request.headers.get("accept-encoding"))
+    headers = {"ETag": figure.etag_for(encoding), "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if figure.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
+
+async def chart_response(request: Request, repo_id: str, chart: str):
+    return await cached_response(request, repo_id, chart, build_chart, chart)
+
+@app.get("/data/all")
+async def all_charts(request: Request, id: str = "default", charts: str = ""):
+    """{chart: figure} for the comma-separated `charts` (every chart by default), in one response."""
+    names = tuple(dict.fromkeys(name.strip() for name in charts.split(",") if name.strip())) or tuple(CHARTS)
+    unknown = [name for name in names if name not in CHARTS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown charts {unknown}; expected some of {list(CHARTS)}")
+    return await cached_response(request, id, "all:" + ",".join(names), build_charts, names)
 
-    lib_df = pd.DataFrame(library_count.items(), columns=["Library", "Count"]).sort_values(by="Count", ascending=False).head(10)
-    fig = px.bar(lib_df, x="Library", y="Count", color="Count", title="Top Imports")
-    fig.update_layout(xaxis_tickangle=-45)
-    return JSONResponse(content=fig.to_json())
+@app.get("/data/lib-count")
+async def lib_count(request: Request, id: str = "default"):
+    return await chart_response(request, id, "lib-count")
 
 @app.get("/data/func-stats")
-async def func_stats(id: str = "default"):
-    file_data_list = load_repo_data(id)
-    class_func_count = []
-    for file in file_data_list:
-        for clazz in file["classes"]:
-            class_func_count.append({"Class": clazz, "Functions": len(file["functions"])})
-    func_df = pd.DataFrame(class_func_count).sort_values(by="Functions", ascending=False).head(10)
-    fig = px.bar(func_df, x="Class", y="Functions", color="Functions", title="Function Count by Class")
-    return JSONResponse(content=fig.to_json())
+async def func_stats(request: Request, id: str = "default"):
+    return await chart_response(request, id, "func-stats")
 
 @app.get("/data/var-stats")
-async def var_stats(id: str = "default"):
-    file_data_list = load_repo_data(id)
-    class_var_count = []
-    for file in file_data_list:
-        for clazz in file["classes"]:
-            class_var_count.append({"Class": clazz, "Variables": len(file["variables"])})
-    var_df = pd.DataFrame(class_var_count).sort_values(by="Variables", ascending=False).head(10)
-    fig = px.bar(var_df, x="Class", y="Variables", color="Variables", title="Variable Count by Class")
-    return JSONResponse(content=fig.to_json())
+async def var_stats(request: Request, id: str = "default"):
+    return await chart_response(request, id, "var-stats")
 
 @app.get("/data/sankey")
-async def sankey(id: str = "default"):
-    file_data_list = load_repo_data(id)
-
-    label_map = {}
-    source_indices = []
-    target_indices = []
-    values = []
-    labels = []
-    idx = 0
-
-    def get_label_index(label):
-        nonlocal idx
-        if label not in label_map:
-            label_map[label] = idx
-            labels.append(label)
-            idx += 1
-        return label_map[label]
-
-    for file in file_data_list:
-        file_idx = get_label_index(file["file_path"])
-        for imp in file["imports"]:
-            imp_idx = get_label_index(imp)
-            source_indices.append(file_idx)
-            target_indices.append(imp_idx)
-            values.append(1)
-
-    dependency_counter = defaultdict(int)
-    for s, t in zip(source_indices, target_indices):
-        dependency_counter[(s, t)] += 1
-
-    top_n = 20
-    sorted_links = sorted(dependency_counter.items(), key=lambda x: x[1], reverse=True)[:top_n]
-
-    sankey_source = [src for (src, tgt), _ in sorted_links]
-    sankey_target = [tgt for (src, tgt), _ in sorted_links]
-    sankey_value = [val for (_, _), val in sorted_links]
-
-    def shorten(label):
-        if label.endswith(".java"):
-            label = label.replace(".java", "")
-        return label if len(label) <= 25 else f"{label[:10]}...{label[-10:]}"
-    
-    shortened_labels = [shorten(label) for label in labels]
-
-    def hex_to_rgba(hex_color, alpha=0.4):
-        hex_color = hex_color.lstrip('#')
-        r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-        return f'rgba({r},{g},{b},{alpha})'
-
-    base_colors = [
-        "#003f5c", "#58508d", "#bc5090", "#ffa600", "#2f4b7c",
-        "#ff6361", "#4C78A8", "#54A24B", "#E45756", "#72B7B2"
-    ]
-    node_colors = [base_colors[i % len(base_colors)] for i in range(len(shortened_labels))]
-    link_colors = [hex_to_rgba(node_colors[src], alpha=0.4) for src in sankey_source]
-
-    fig_sankey = go.Figure(go.Sankey(
-        arrangement='snap',
-        node=dict(
-            pad=20,
-            thickness=20,
-            line=dict(color="black", width=1.2),
-            label=shortened_labels,
-            color=node_colors,
-            hovertemplate='%{label}<extra></extra>',
-        ),
-        link=dict(
-            source=sankey_source,
-            target=sankey_target,
-            value=sankey_value,
-            color=link_colors,
-            hovertemplate='📂 From %{source.label}<br>📥 To %{target.label}<br>🔁 Usage: %{value}<extra></extra>',
-        )
-    ))
-
-    fig_sankey.update_layout(
-        title=dict(
-            text="🔗 Top 20 File-to-Import Dependencies",
-            x=0.5,
-            xanchor='center',
-            font=dict(size=22, color='black')
-        ),
-        font=dict(size=16, color='black', family="Arial"),
-        margin=dict(l=10, r=10, t=90, b=40),
-        height=800,
-        paper_bgcolor='white',
-        plot_bgcolor='white'
-    )
-    return JSONResponse(content=fig_sankey.to_json())
+async def sankey(request: Request, id: str = "default", mode: str = "files"):
+    """File -> import links, or with mode=packages directory -> module links."""
+    if mode not in ("files", "packages"):
+        raise HTTPException(status_code=400, detail="mode must be `files` or `packages`")
+    return await chart_response(request, id, "sankey" if mode == "files" else "sankey-packages")
 
 @app.get("/data/pie")
-async def pie(id: str = "default"):
-    file_data_list = load_repo_data(id)
-    all_imports = [imp.split(".")[-1] for file in file_data_list for imp in file["imports"]]
-    import_freq = pd.Series(all_imports).value_counts().reset_index()
-    import_freq.columns = ["Library", "Count"]
-    top_20_imports = import_freq.head(20)
-
-    fig_pie = px.pie(
-        top_20_imports,
-        names="Library",
-        values="Count",
-        title="🍰 Top 20 Library Imports (Most Used)"
-    )
-    return JSONResponse(content=fig_pie.to_json())
+async def pie(request: Request, id: str = "default"):
+    return await chart_response(request, id, "pie")
+
+def require_store():
+    store = get_repo_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Repo store is disabled (REPO_STORE_PATH is empty)")
+    return store
+
+@app.get("/data/repos")
+async def repos():
+    return {"repos": await asyncio.to_thread(require_store().repo_ids)}
+
+@app.get("/data/imports/top")
+async def top_imports(limit: int = 20, repo_id: str = None):
+    """Most imported libraries across every stored repo, or one."""
+    rows = await asyncio.to_thread(require_store().top_imports, limit, repo_id)
+    return [{"library": library, "imports": count} for library, count in rows]
+
+@app.get("/data/imports/{library}/repos")
+async def repos_importing(library: str):
+    rows = await asyncio.to_thread(require_store().repos_importing, library)
+    return [{"repo_id": repo_id, "files": files} for repo_id, files in rows]
+
+@app.get("/data/repo-classes")
+async def repo_classes(id: str = "default"):
+    """One repo's classes with their function and variable counts, most functions first."""
+    rows = await asyncio.to_thread(require_store().repo_classes, resolve_repo_id(id))
+    return [{"class": name, "file_path": path, "functions": functions, "variables": variables}
+            for name, path, functions, variables in rows]
+
+@app.get("/data/classes/{name}")
+async def find_class(name: str):
+    rows = await asyncio.to_thread(require_store().find_class, name)
+    return [{"repo_id": repo_id, "file_path": path} for repo_id, path in rows]
+
+@app.get("/data/files")
+async def find_file(path: str):
+    """Every stored repo's record for the file at `path`."""
+    rows = await asyncio.to_thread(require_store().find_file, path)
+    return [{"repo_id": repo_id, "record": record} for repo_id, record in rows]
+
+@app.get("/data/cache")
+async def repo_cache_stats():
+    return get_repo_model_cache().stats()
+
+@app.get("/data/cache/figures")
+async def figure_cache_stats():
+    return get_figure_cache().stats()
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("main:app", host="127.0.0.1", port=8002, reload=True)
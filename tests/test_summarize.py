@@ -0,0 +1,76 @@
+import re
+import time
+from types import SimpleNamespace
+
+import WokringChatGptSummarizeAgent
+from WokringChatGptSummarizeAgent import estimate_tokens, map_reduce_summary
+from benchmarks.bench_summarize import synthetic_metadata
+from benchmarks.stub_llm import StubLLM
+
+BUDGET = 2500
+
+
+class PartTaggingLLM(StubLLM):
+    """StubLLM whose map-step answers name their part; later parts finish first."""
+
+    def __call__(self, prompt, max_tokens=500):
+        match = re.search(r"reviewing part (\d+) of (\d+)", prompt)
+        if match:
+            index, total = int(match.group(1)), int(match.group(2))
+            time.sleep(0.002 * (total - index))
+        answer = super().__call__(prompt, max_tokens)
+        return f"PARTIAL-{match.group(1)} {answer}" if match else answer
+
+
+def large_metadata(n_files):
+    metadata = synthetic_metadata(n_files)
+    metadata["project_metadata"]["dependencies"] = [f"org.example:artifact-{i}:1.{i}.0" for i in range(300)]
+    metadata["findings"] = [{"file_path": f"pkg0/module_{i}.py", "line": i, "rule": "aws-access-key"}
+                            for i in range(300)]
+    return metadata
+
+
+def test_every_prompt_fits_the_budget():
+    llm = StubLLM(latency=0, answer_words=300)
+    map_reduce_summary(large_metadata(2000), llm=llm, budget=BUDGET, concurrency=4)
+    assert len(llm.prompts) > 1
+    assert max(estimate_tokens(prompt) for prompt in llm.prompts) <= BUDGET
+
+
+def test_small_repo_is_a_single_prompt():
+    llm = StubLLM(latency=0)
+    map_reduce_summary(synthetic_metadata(5), llm=llm, budget=BUDGET)
+    assert len(llm.prompts) == 1
+
+
+def test_partials_are_merged_in_order():
+    llm = PartTaggingLLM(latency=0, answer_words=20)
+    map_reduce_summary(synthetic_metadata(300), llm=llm, budget=BUDGET, concurrency=4)
+    chunk_prompts = [prompt for prompt in llm.prompts if "reviewing part" in prompt]
+    assert len(chunk_prompts) > 2
+    merged = [int(n) for n in re.findall(r"PARTIAL-(\d+)", llm.prompts[-1])]
+    assert merged == list(range(1, len(chunk_prompts) + 1))
+
+
+def test_concurrency_is_bounded():
+    llm = StubLLM(latency=0.01)
+    map_reduce_summary(synthetic_metadata(1000), llm=llm, budget=BUDGET, concurrency=3)
+    assert 1 < llm.max_in_flight <= 3
+
+
+def test_unknown_model_falls_back_to_a_base_encoding(monkeypatch):
+    requested = []
+
+    def encoding_for_model(model):
+        raise KeyError(model)
+
+    def get_encoding(name):
+        requested.append(name)
+        return SimpleNamespace(encode=str.split)
+
+    monkeypatch.setattr(WokringChatGptSummarizeAgent, "tiktoken",
+                        SimpleNamespace(encoding_for_model=encoding_for_model, get_encoding=get_encoding))
+    monkeypatch.setattr(WokringChatGptSummarizeAgent, "_encoding", None)
+    monkeypatch.setattr(WokringChatGptSummarizeAgent, "MODEL", "local-model")
+    assert estimate_tokens("three short words") == 3
+    assert requested == ["cl100k_base"]